@@ -1,94 +1,122 @@
 # scripts/analyze_frequencies.py
+"""
+Word and bigram frequencies over the latest clustered articles, exported to Excel.
+
+Counts are column sums of the shared document-term matrix (doc_term.py)
+over text_clean, so the corpus isn't re-tokenized here. Non-interactive by
+default so it can run unattended; pass --search for the terminal
+word/bigram lookup. report.py reuses these functions.
+"""
+import argparse
 import pandas as pd
 import re
-from collections import Counter
-from nltk.util import ngrams
 import nltk
-import glob
 from datetime import datetime
 
-# ✅ Ensure stopwords are available
-try:
-    from nltk.corpus import stopwords
-    stop_words = set(stopwords.words("english"))
-except LookupError:
-    nltk.download("stopwords")
-    from nltk.corpus import stopwords
-    stop_words = set(stopwords.words("english"))
-
-# --- Step 1: Find latest clustered CSV ---
-clustered_files = sorted(glob.glob("data/rss_results_clustered_*.csv"))
-if clustered_files:
-    latest_file = clustered_files[-1]
-else:
-    latest_file = "data/rss_results_clustered.csv"
-print("Using input file:", latest_file)
-
-df = pd.read_csv(latest_file)
-if df.empty:
-    print("⚠️ No results to analyze. Try running ingest_rss.py → clean_embed.py → cluster_topics.py first.")
-    exit()
-
-# --- Step 2: Combine text ---
-text_data = " ".join(df["title"].astype(str) + " " + df["summary"].astype(str))
-text_data = re.sub(r"[^a-zA-Z\s]", "", text_data).lower()
-
-# --- Step 3: Tokenize ---
-words = text_data.split()
-filtered_words = [w for w in words if w not in stop_words and len(w) > 2]
-
-# --- Step 4: Word + Bigram Frequencies ---
-word_counts = Counter(filtered_words)
-bigrams = list(ngrams(filtered_words, 2))
-bigram_counts = Counter(bigrams)
-
-print("\n🔝 Top 20 Words:")
-for word, freq in word_counts.most_common(20):
-    print(f"{word}: {freq}")
-
-print("\n🔝 Top 20 Bigrams:")
-for phrase, freq in bigram_counts.most_common(20):
-    print(f"{' '.join(phrase)}: {freq}")
-
-# --- Step 5: Export to Excel ---
-timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-excel_path = f"data/frequency_analysis_{timestamp}.xlsx"
-
-with pd.ExcelWriter(excel_path) as writer:
-    pd.DataFrame(word_counts.most_common(50), columns=["Word", "Count"]).to_excel(
-        writer, sheet_name="Word Frequencies", index=False
-    )
-    pd.DataFrame(
-        [(" ".join(k), v) for k, v in bigram_counts.most_common(50)],
-        columns=["Bigram", "Count"]
-    ).to_excel(writer, sheet_name="Bigram Frequencies", index=False)
-
-print(f"\n✅ Frequency analysis exported to {excel_path}")
-
-# --- Step 6: Interactive Search ---
-print("\n🔍 Search for words or bigrams in the articles (type 'exit' to quit):")
-while True:
-    user_input = input("Enter a word or bigram: ").strip()
-    if user_input.lower() == "exit":
-        break
-
-    search_words = user_input.lower().split()
-    if len(search_words) not in [1, 2]:
-        print("⚠️ Please enter either one word or two words (bigram).")
-        continue
-
-    print(f"\nArticles containing '{user_input}':\n")
-    found = False
-    for idx, row in df.iterrows():
-        text = (row['title'] + " " + row['summary']).lower()
-        if all(word in text for word in search_words):
-            summary_highlight = row['summary']
-            for word in search_words:
-                summary_highlight = re.sub(f"(?i)({word})", r"[\1]", summary_highlight)
-            print(f"- {row['title']}\n  {summary_highlight}\n  Link: {row['link']}")
-            if "ingested_at" in row:
-                print(f"  Ingested at: {row['ingested_at']}")
-            print("")
-            found = True
-    if not found:
-        print("No articles found containing that search.\n")
+import artifacts
+import doc_term
+
+
+def load_stopwords():
+    # ✅ Ensure stopwords are available
+    try:
+        from nltk.corpus import stopwords
+        return set(stopwords.words("english"))
+    except LookupError:
+        nltk.download("stopwords")
+        from nltk.corpus import stopwords
+        return set(stopwords.words("english"))
+
+
+def fallback_text(df, stop_words):
+    """text_clean stand-in for files that predate clean_embed.py: letters only, stopwords dropped."""
+    text = (df["title"].astype(str) + " " + df["summary"].astype(str)).str.replace(r"[^a-zA-Z\s]", "", regex=True)
+    return text.str.lower().str.split().map(lambda ws: " ".join(w for w in ws if w not in stop_words and len(w) > 2))
+
+
+def word_bigram_counts(df, stop_words=None):
+    """(word_counts, bigram_counts) as descending Series (bigrams space-joined) from the document-term matrix."""
+    if "text_clean" not in df.columns:
+        df = df.assign(text_clean=fallback_text(df, stop_words if stop_words is not None else load_stopwords()))
+    X, vocab = doc_term.for_frame(df)
+    return doc_term.term_frequencies(X, vocab, ngram=1), doc_term.term_frequencies(X, vocab, ngram=2)
+
+
+def export_excel(word_counts, bigram_counts, excel_path):
+    with pd.ExcelWriter(excel_path) as writer:
+        pd.DataFrame({"Word": word_counts.index[:50], "Count": word_counts.values[:50]}).to_excel(
+            writer, sheet_name="Word Frequencies", index=False
+        )
+        pd.DataFrame({"Bigram": bigram_counts.index[:50], "Count": bigram_counts.values[:50]}).to_excel(
+            writer, sheet_name="Bigram Frequencies", index=False
+        )
+
+
+def interactive_search(df):
+    print("\n🔍 Search for words or bigrams in the articles (type 'exit' to quit):")
+    while True:
+        user_input = input("Enter a word or bigram: ").strip()
+        if user_input.lower() == "exit":
+            break
+
+        search_words = user_input.lower().split()
+        if len(search_words) not in [1, 2]:
+            print("⚠️ Please enter either one word or two words (bigram).")
+            continue
+
+        print(f"\nArticles containing '{user_input}':\n")
+        found = False
+        for idx, row in df.iterrows():
+            text = (row['title'] + " " + row['summary']).lower()
+            if all(word in text for word in search_words):
+                summary_highlight = row['summary']
+                for word in search_words:
+                    summary_highlight = re.sub(f"(?i)({word})", r"[\1]", summary_highlight)
+                print(f"- {row['title']}\n  {summary_highlight}\n  Link: {row['link']}")
+                if "ingested_at" in row:
+                    print(f"  Ingested at: {row['ingested_at']}")
+                print("")
+                found = True
+        if not found:
+            print("No articles found containing that search.\n")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--search", action="store_true", help="Open the interactive word/bigram search afterwards")
+    args = ap.parse_args()
+
+    # --- Step 1: Find latest clustered CSV ---
+    latest_file = artifacts.resolve("clustered") or "data/rss_results_clustered.csv"
+    print("Using input file:", latest_file)
+
+    df = pd.read_csv(latest_file)
+    if df.empty:
+        print("⚠️ No results to analyze. Try running ingest_rss.py → clean_embed.py → cluster_topics.py first.")
+        return
+
+    # --- Step 2: Word + Bigram Frequencies ---
+    word_counts, bigram_counts = word_bigram_counts(df)
+
+    print("\n🔝 Top 20 Words:")
+    for word, freq in word_counts.head(20).items():
+        print(f"{word}: {freq}")
+
+    print("\n🔝 Top 20 Bigrams:")
+    for phrase, freq in bigram_counts.head(20).items():
+        print(f"{phrase}: {freq}")
+
+    # --- Step 3: Export to Excel ---
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    excel_path = f"data/frequency_analysis_{timestamp}.xlsx"
+    export_excel(word_counts, bigram_counts, excel_path)
+    artifacts.record("frequency_analysis", excel_path, rows=len(word_counts), inputs=[latest_file])
+    print(f"\n✅ Frequency analysis exported to {excel_path}")
+
+    # --- Step 4: Interactive Search (opt-in) ---
+    if args.search:
+        interactive_search(df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+# scripts/artifacts.py
+"""
+Artifact manifest: one SQLite catalog (data/state/artifacts.sqlite) of every
+stage output with its run id, stage, path, row count, schema and upstream
+inputs.
+
+Stages resolve their inputs with an indexed lookup instead of globbing and
+sorting a growing directory, and lineage is exact: cluster_topics.py gets the
+embeddings that were written *for* the cleaned CSV it reads, not whichever
+.npy/.npz happens to sort last.
+
+Outputs written by a memoized pipeline stage also carry that stage's
+fingerprint (see stage_cache.py), and table stage_runs marks which
+fingerprints completed, so run_pipeline.py can reuse them instead of
+re-running the stage.
+
+Files written before the manifest existed are still found through the glob
+fallback in resolve(), or can be imported once with:
+
+    python scripts/artifacts.py --import-existing
+"""
+
+import argparse
+import glob
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+
+MANIFEST_PATH = "data/state/artifacts.sqlite"
+RUN_ID_ENV = "TREND_RUN_ID"
+FINGERPRINT_ENV = "TREND_STAGE_FINGERPRINT"  # set by run_pipeline.py for memoized stages
+DAY_DIR_RE = re.compile(r"^\d{2}-\d{2}-\d{4}$")  # run_pipeline's archive folders (DD-MM-YYYY)
+BACKFILL_RUN_PREFIX = "backfill_"  # reprocessed history: in history(), never latest()
+
+# stage -> (glob, filename regex) used for the legacy fallback and --import-existing
+STAGE_PATTERNS = {
+    "ingest": ("data/rss_results_*.csv", r"^rss_results_\d{8}_\d{6}\.csv$"),
+    "tagged": ("data/rss_results_tagged_*.csv", r"^rss_results_tagged_\d{8}_\d{6}\.csv$"),
+    "clean": ("data/rss_results_with_clean_*.csv", r"^rss_results_with_clean_\d{8}_\d{6}\.csv$"),
+    "embeddings": ("models/embeddings_*.np[yz]", r"^embeddings_\d{8}_\d{6}\.np[yz]$"),
+    "clustered": ("data/rss_results_clustered_*.csv", r"^rss_results_clustered_[\d_]+\.csv$"),
+    "topic_info": ("data/topic_info_*.csv", r"^topic_info_[\d_]+\.csv$"),
+    "trend_scores": ("data/trend_scores_*.csv", r"^trend_scores_\d{8}_\d{6}\.csv$"),
+    "keyword_frequencies": ("data/keyword_frequencies_*.csv", r"^keyword_frequencies_\d{8}_\d{6}\.csv$"),
+    "frequency_analysis": ("data/frequency_analysis_*.xlsx", r"^frequency_analysis_\d{8}_\d{6}\.xlsx$"),
+    "topic_counts": ("data/topic_counts_*.png", r"^topic_counts_\d{8}_\d{6}\.png$"),
+    "moda_delta": ("data/moda_delta_*.csv", r"^moda_delta_\d{8}_\d{6}\.csv$"),
+    "farfetch_delta": ("data/farfetch_delta_*.csv", r"^farfetch_delta_\d{8}_\d{6}\.csv$"),
+    "bursts": ("data/bursts_*.csv", r"^bursts_\d{8}_\d{6}\.csv$"),
+    "product_terms": ("data/product_terms_*.csv", r"^product_terms_\d{8}_\d{6}\.csv$"),
+    "product_trend_scores": ("data/product_trend_scores_*.csv", r"^product_trend_scores_\d{8}_\d{6}\.csv$"),
+    "image_matches": ("data/image_matches_*.csv", r"^image_matches_\d{8}_\d{6}\.csv$"),
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id         INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id     TEXT NOT NULL,
+    stage      TEXT NOT NULL,
+    path       TEXT NOT NULL UNIQUE,
+    rows       INTEGER,
+    schema     TEXT,
+    inputs     TEXT NOT NULL DEFAULT '[]',
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_artifacts_stage ON artifacts (stage, id);
+CREATE INDEX IF NOT EXISTS idx_artifacts_run ON artifacts (run_id);
+CREATE TABLE IF NOT EXISTS stage_runs (
+    fingerprint  TEXT PRIMARY KEY,
+    step         TEXT NOT NULL,
+    outputs      INTEGER NOT NULL,
+    completed_at TEXT NOT NULL
+);
+"""
+
+_conn = None
+
+
+def _db():
+    global _conn
+    if _conn is None:
+        os.makedirs(os.path.dirname(MANIFEST_PATH), exist_ok=True)
+        # shared with the watcher / worker threads of serve.py and the ingest daemon
+        _conn = sqlite3.connect(MANIFEST_PATH, timeout=30, check_same_thread=False)
+        _conn.executescript(SCHEMA)
+        cols = {r[1] for r in _conn.execute("PRAGMA table_info(artifacts)")}
+        if "fingerprint" not in cols:  # manifests created before stage memoization
+            _conn.execute("ALTER TABLE artifacts ADD COLUMN fingerprint TEXT")
+        _conn.execute("CREATE INDEX IF NOT EXISTS idx_artifacts_fingerprint ON artifacts (fingerprint)")
+    return _conn
+
+
+def _norm(path):
+    return os.path.normpath(path).replace(os.sep, "/")
+
+
+def current_run_id():
+    """Run id set by run_pipeline.py, or a fresh timestamp for standalone runs."""
+    rid = os.environ.get(RUN_ID_ENV)
+    if not rid:
+        rid = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        os.environ[RUN_ID_ENV] = rid
+    return rid
+
+
+def record(stage, path, df=None, rows=None, schema=None, inputs=(), run_id=None):
+    """Register a stage output. Pass the DataFrame written (df) to capture rows + schema."""
+    if df is not None:
+        rows = len(df)
+        schema = {c: str(t) for c, t in df.dtypes.items()}
+    conn = _db()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO artifacts (run_id, stage, path, rows, schema, inputs, created_at, fingerprint) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                run_id or current_run_id(), stage, _norm(path), rows,
+                json.dumps(schema) if schema is not None else None,
+                json.dumps([_norm(p) for p in inputs]),
+                datetime.now(timezone.utc).isoformat(),
+                os.environ.get(FINGERPRINT_ENV),
+            ),
+        )
+
+
+def latest(stage):
+    """Path of the newest recorded artifact for a stage (ignoring backfills), or None."""
+    row = _db().execute(
+        "SELECT path FROM artifacts WHERE stage = ? AND run_id NOT LIKE ? ORDER BY id DESC LIMIT 1",
+        (stage, BACKFILL_RUN_PREFIX + "%"),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def previous(stage, run_id=None):
+    """Newest artifact of a stage recorded by an earlier run than run_id (default: this run), or None."""
+    row = _db().execute(
+        "SELECT path FROM artifacts WHERE stage = ? AND run_id != ? AND run_id NOT LIKE ? ORDER BY id DESC LIMIT 1",
+        (stage, run_id or current_run_id(), BACKFILL_RUN_PREFIX + "%"),
+    ).fetchone()
+    if row:
+        return row[0]
+    files = legacy_glob(stage)
+    return files[-1] if files else None
+
+
+def paths(stage):
+    """All recorded artifact paths for a stage, oldest first."""
+    return [r[0] for r in _db().execute(
+        "SELECT path FROM artifacts WHERE stage = ? ORDER BY id", (stage,)
+    )]
+
+
+def derived(input_path, stage):
+    """Newest artifact of `stage` produced from input_path (exact lineage), or None."""
+    row = _db().execute(
+        "SELECT a.path FROM artifacts a, json_each(a.inputs) i "
+        "WHERE a.stage = ? AND i.value = ? ORDER BY a.id DESC LIMIT 1",
+        (stage, _norm(input_path)),
+    ).fetchone()
+    return row[0] if row else None
+
+
+def info(path):
+    """Manifest row for a path as a dict, or None."""
+    cur = _db().execute("SELECT * FROM artifacts WHERE path = ?", (_norm(path),))
+    row = cur.fetchone()
+    if row is None:
+        return None
+    out = dict(zip([d[0] for d in cur.description], row))
+    out["inputs"] = json.loads(out["inputs"])
+    out["schema"] = json.loads(out["schema"]) if out["schema"] else None
+    return out
+
+
+def run_outputs(run_id):
+    return [r[0] for r in _db().execute(
+        "SELECT path FROM artifacts WHERE run_id = ? ORDER BY id", (run_id,)
+    )]
+
+
+def relocate(old_path, new_path):
+    """Keep the manifest (paths and lineage) correct after moving a file."""
+    old, new = _norm(old_path), _norm(new_path)
+    conn = _db()
+    with conn:
+        conn.execute("UPDATE artifacts SET path = ? WHERE path = ?", (new, old))
+        for aid, inputs in conn.execute(
+            "SELECT a.id, a.inputs FROM artifacts a, json_each(a.inputs) i WHERE i.value = ?", (old,)
+        ).fetchall():
+            fixed = [new if p == old else p for p in json.loads(inputs)]
+            conn.execute("UPDATE artifacts SET inputs = ? WHERE id = ?", (json.dumps(fixed), aid))
+
+
+def complete_stage(fingerprint, step):
+    """Mark a memoized stage run as finished (after its process exited cleanly)."""
+    conn = _db()
+    n = conn.execute("SELECT COUNT(*) FROM artifacts WHERE fingerprint = ?", (fingerprint,)).fetchone()[0]
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO stage_runs (fingerprint, step, outputs, completed_at) VALUES (?, ?, ?, ?)",
+            (fingerprint, step, n, datetime.now(timezone.utc).isoformat()),
+        )
+
+
+def cached_outputs(fingerprint):
+    """Output paths of a completed stage run with this fingerprint, or None if it must run.
+
+    None when the fingerprint never completed or any of its outputs is gone.
+    """
+    conn = _db()
+    row = conn.execute("SELECT outputs FROM stage_runs WHERE fingerprint = ?", (fingerprint,)).fetchone()
+    if row is None:
+        return None
+    found = [r[0] for r in conn.execute(
+        "SELECT path FROM artifacts WHERE fingerprint = ? ORDER BY id", (fingerprint,)
+    )]
+    if len(found) != row[0] or not all(os.path.exists(p) for p in found):
+        return None
+    return found
+
+
+def republish(path, run_id=None):
+    """Make an existing artifact the newest of its stage again, under run_id (reused cache hit)."""
+    conn = _db()
+    with conn:
+        conn.execute(
+            "UPDATE artifacts SET id = (SELECT MAX(id) + 1 FROM artifacts), run_id = ? WHERE path = ?",
+            (run_id or current_run_id(), _norm(path)),
+        )
+
+
+def _stamp_key(path):
+    """Chronological sort key: the filename's [YYYYMMDD_]HHMMSS stamp, dated by the
+    stamp itself or else by the DD-MM-YYYY folder it sits in (path breaks ties)."""
+    stamp = "".join(re.findall(r"\d+", os.path.basename(path)))
+    day = stamp[:-6][-8:] if len(stamp) >= 14 else ""
+    folder = os.path.basename(os.path.dirname(path))
+    if not day and DAY_DIR_RE.match(folder):
+        d, m, y = folder.split("-")
+        day = y + m + d
+    return day, stamp[-6:], path
+
+
+def legacy_glob(stage, dated=False):
+    """Files on disk matching a stage's pattern in data/ (and, with dated=True, its dated folders)."""
+    pattern, name_re = STAGE_PATTERNS[stage]
+    rx = re.compile(name_re)
+    found = glob.glob(pattern)
+    if dated:
+        d, base = os.path.split(pattern)
+        found += [f for f in glob.glob(os.path.join(d, "*", base))
+                  if DAY_DIR_RE.match(os.path.basename(os.path.dirname(f)))]
+        return sorted((_norm(f) for f in found if rx.search(os.path.basename(f))), key=_stamp_key)
+    return sorted(f for f in found if rx.search(os.path.basename(f)))
+
+
+def resolve(stage):
+    """Manifest lookup with a glob fallback for files that predate the manifest."""
+    path = latest(stage)
+    if path:
+        return path
+    files = legacy_glob(stage)
+    return files[-1] if files else None
+
+
+def history(stage):
+    """Every artifact path for a stage, oldest first: files on disk the manifest doesn't know
+    (data/ and dated folders, by date and time stamp) followed by the manifest's, in record order.
+
+    A dated folder that a backfill reprocessed contributes only the backfill's
+    outputs, so superseded originals aren't counted twice.
+    """
+    rows = _db().execute("SELECT path, run_id FROM artifacts WHERE stage = ? ORDER BY id", (stage,)).fetchall()
+    recorded = {p for p, _ in rows}
+    rows = [(f, None) for f in legacy_glob(stage, dated=True) if f not in recorded] + rows
+    backfilled = {os.path.dirname(p) for p, rid in rows if rid and rid.startswith(BACKFILL_RUN_PREFIX)}
+    return [p for p, rid in rows
+            if os.path.dirname(p) not in backfilled or (rid and rid.startswith(BACKFILL_RUN_PREFIX))]
+
+
+def import_existing():
+    """One-off: register files already on disk (data/, dated folders, models/)."""
+    n = 0
+    for stage, (pattern, name_re) in STAGE_PATTERNS.items():
+        rx = re.compile(name_re)
+        d, base = os.path.split(pattern)
+        found = glob.glob(os.path.join(d, base)) + glob.glob(os.path.join(d, "*", base))
+        for f in sorted(found, key=os.path.basename):
+            if not rx.search(os.path.basename(f)) or info(f):
+                continue
+            ts = re.search(r"(\d{8}_\d{6})", os.path.basename(f))
+            record(stage, f, run_id=ts.group(1) if ts else "legacy")
+            n += 1
+    return n
+
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Inspect or seed the artifact manifest")
+    ap.add_argument("--import-existing", action="store_true", help="Register files written before the manifest")
+    ap.add_argument("--stage", help="Show the latest artifact for a stage")
+    ap.add_argument("--lineage", help="Show the manifest entry (inputs, rows, schema) for a path")
+    args = ap.parse_args()
+    if args.import_existing:
+        print(f"Registered {import_existing()} existing files in {MANIFEST_PATH}")
+    if args.stage:
+        print(args.stage, "->", resolve(args.stage))
+    if args.lineage:
+        print(json.dumps(info(args.lineage), indent=2))
@@ -0,0 +1,185 @@
+# scripts/backfill.py
+"""
+Reprocess archived daily folders (data/DD-MM-YYYY/) through chosen stages.
+
+Use after changing seed keywords, cleaning rules or the embedding model:
+every raw rss_results_<ts>.csv in the date range is re-tagged / re-cleaned /
+re-embedded / re-clustered in a process pool, one raw file per worker. Outputs go
+back into the same dated folder under the raw file's timestamp and are
+recorded in the artifact manifest under a backfill_<ts> run id, so they never
+become "latest" for the daily pipeline; in history() they replace the
+folder's original outputs of the same stage.
+
+--stages cluster on its own uses the clean file the daily run made from the
+raw file (manifest lineage, else the day folder's clean file stamped closest
+after it - the daily pipeline stamps each stage separately).
+
+Progress is checkpointed per (raw file, stage) in data/state/backfill.json;
+--resume skips what already finished with the same stage list.
+
+    python scripts/backfill.py --since 2025-09-01 --until 2025-09-30 --stages tag,clean,cluster --workers 4
+    python scripts/backfill.py --since 2025-09-01 --resume
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timezone
+
+import artifacts
+
+BASE_DATA_DIR = "data"
+CHECKPOINT_PATH = "data/state/backfill.json"
+DAY_DIR_RE = re.compile(r"^\d{2}-\d{2}-\d{4}$")
+RAW_RE = re.compile(r"^rss_results_(\d{8}_\d{6})\.csv$")
+CLEAN_RE = re.compile(r"^rss_results_with_clean_(\d{8}_\d{6})\.csv$")
+
+
+def clean_input(raw, day_dir, ts):
+    """The clean CSV to cluster for a raw file: this backfill's, its recorded derivative, or the
+    day folder's clean file stamped closest at/after the raw file (None if there is none)."""
+    own = os.path.join(day_dir, f"rss_results_with_clean_{ts}.csv")
+    if os.path.exists(own):
+        return own
+    derived = artifacts.derived(raw, "clean")
+    if derived and os.path.exists(derived):
+        return derived
+    stamps = sorted(m.group(1) for f in os.listdir(day_dir) if (m := CLEAN_RE.match(f)))
+    after = [s for s in stamps if s >= ts]
+    if not after:
+        return None
+    return os.path.join(day_dir, f"rss_results_with_clean_{after[0]}.csv")
+
+
+def cluster_command(raw, day, ts):
+    clean = clean_input(raw, day, ts)
+    if clean is None:
+        raise FileNotFoundError(f"no clean CSV for {raw}; include the clean stage")
+    return ["scripts/cluster_topics.py", "--out-dir", day, "--no-save-model", "--no-carry-over",
+            "--input", clean]
+
+
+# stage -> command builder(raw_path, day_dir, ts)
+STAGES = {
+    "tag": lambda raw, day, ts: ["scripts/tag_keywords.py", "--input", raw, "--out-dir", day, "--timestamp", ts],
+    "clean": lambda raw, day, ts: ["scripts/clean_embed.py", "--input", raw, "--out-dir", day, "--timestamp", ts],
+    "cluster": cluster_command,
+}
+STAGE_ORDER = list(STAGES)
+
+
+def archived_days(since=None, until=None):
+    """[(date, folder)] for dated folders within [since, until], oldest first."""
+    days = []
+    for name in os.listdir(BASE_DATA_DIR):
+        path = os.path.join(BASE_DATA_DIR, name)
+        if not (os.path.isdir(path) and DAY_DIR_RE.match(name)):
+            continue
+        day = datetime.strptime(name, "%d-%m-%Y").date()
+        if (since and day < since) or (until and day > until):
+            continue
+        days.append((day, path))
+    return sorted(days)
+
+
+def raw_files(day_dir):
+    return sorted(
+        (os.path.join(day_dir, f), m.group(1))
+        for f in os.listdir(day_dir) if (m := RAW_RE.match(f))
+    )
+
+
+def load_checkpoint():
+    try:
+        with open(CHECKPOINT_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_checkpoint(cp):
+    os.makedirs(os.path.dirname(CHECKPOINT_PATH), exist_ok=True)
+    tmp = CHECKPOINT_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(cp, f, indent=2)
+    os.replace(tmp, CHECKPOINT_PATH)
+
+
+def process_raw(raw, day_dir, ts, stages, done, run_id):
+    """Run the stages for one raw file (in a worker). Returns (raw, finished_stages, error)."""
+    env = dict(os.environ, **{artifacts.RUN_ID_ENV: run_id})
+    finished = []
+    for stage in stages:
+        if stage in done:
+            continue
+        try:
+            cmd = [sys.executable] + STAGES[stage](raw, day_dir, ts)
+        except FileNotFoundError as e:
+            return raw, finished, f"{stage} failed: {e}"
+        res = subprocess.run(cmd, env=env, capture_output=True, text=True)
+        if res.returncode != 0:
+            return raw, finished, f"{stage} failed:\n{res.stderr[-2000:]}"
+        finished.append(stage)
+    return raw, finished, None
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Reprocess archived daily folders through pipeline stages")
+    ap.add_argument("--since", type=lambda s: datetime.strptime(s, "%Y-%m-%d").date(), help="YYYY-MM-DD (inclusive)")
+    ap.add_argument("--until", type=lambda s: datetime.strptime(s, "%Y-%m-%d").date(), help="YYYY-MM-DD (inclusive)")
+    ap.add_argument("--stages", default="tag,clean,cluster", help=f"Comma-separated subset of {','.join(STAGE_ORDER)}")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--resume", action="store_true", help="Skip (file, stage) pairs finished by a previous backfill")
+    args = ap.parse_args()
+
+    stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        ap.error(f"unknown stages: {', '.join(sorted(unknown))}")
+    stages = [s for s in STAGE_ORDER if s in stages]  # always run in pipeline order
+
+    cp = load_checkpoint() if args.resume else {}
+    if args.resume and cp.get("stages") not in (None, stages):
+        print(f"⚠️ Checkpoint was for stages {cp['stages']}; resuming with {stages}")
+    cp["stages"] = stages
+    cp.setdefault("done", {})
+    run_id = cp.get("run_id") if args.resume and cp.get("run_id") else \
+        artifacts.BACKFILL_RUN_PREFIX + datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    cp["run_id"] = run_id
+    save_checkpoint(cp)
+
+    jobs = []
+    for day, day_dir in archived_days(args.since, args.until):
+        for raw, ts in raw_files(day_dir):
+            done = cp["done"].get(raw, [])
+            if all(s in done for s in stages):
+                continue
+            jobs.append((raw, day_dir, ts, done))
+
+    print(f"🗂️  Backfill {run_id}: {len(jobs)} raw files, stages {stages}, {args.workers} workers")
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = [pool.submit(process_raw, raw, day_dir, ts, stages, done, run_id)
+                   for raw, day_dir, ts, done in jobs]
+        for fut in as_completed(futures):
+            raw, finished, error = fut.result()
+            cp["done"][raw] = sorted(set(cp["done"].get(raw, [])) | set(finished), key=STAGE_ORDER.index)
+            save_checkpoint(cp)
+            if error:
+                failures += 1
+                print(f"❌ {raw}: {error}")
+            else:
+                print(f"✅ {raw}: {', '.join(finished) or 'nothing to do'}")
+
+    if failures:
+        print(f"\n{failures} file(s) failed; fix and re-run with --resume.")
+        sys.exit(1)
+    print("\n🎉 Backfill complete.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# scripts/bench_clustering.py
+"""
+Scaling benchmark: exact vs large-corpus clustering on synthetic embeddings.
+
+Synthetic data = `--clusters` Gaussian blobs on the unit sphere in 384 dims
+(the all-MiniLM-L6-v2 width). Each (size, mode) runs in a fresh process so
+peak RSS is measured in isolation. Reports wall time, peak memory, number of
+clusters, and agreement (adjusted Rand index) with the exact path and with
+the generating blobs.
+
+    python scripts/bench_clustering.py --sizes 10000,100000,500000 --exact-max 100000
+
+Results are printed and saved to data/bench_clustering_<timestamp>.csv.
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import adjusted_rand_score
+
+DIM = 384
+
+
+def synthetic_embeddings(n, n_clusters, seed=0, spread=0.35):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, DIM)).astype(np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    truth = rng.integers(0, n_clusters, size=n)
+    emb = centers[truth] + rng.standard_normal((n, DIM)).astype(np.float32) * (spread / np.sqrt(DIM))
+    emb /= np.linalg.norm(emb, axis=1, keepdims=True)
+    return emb, truth
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  # bytes on macOS, KiB on Linux
+
+
+def _run(mode, n, n_clusters, sample_size):
+    # imported in the child so the parent's RSS doesn't count
+    from scalable_cluster import cluster_exact, cluster_large
+
+    emb, truth = synthetic_embeddings(n, n_clusters)
+    t0 = time.perf_counter()
+    if mode == "exact":
+        labels = cluster_exact(emb)
+    else:
+        labels = cluster_large(emb, sample_size=sample_size)
+    return {
+        "seconds": time.perf_counter() - t0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "labels": np.asarray(labels, dtype=np.int32),
+        "truth": truth.astype(np.int32),
+    }
+
+
+def run_isolated(mode, n, n_clusters, sample_size):
+    ctx = mp.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+        return pool.submit(_run, mode, n, n_clusters, sample_size).result()
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmark exact vs large-corpus clustering")
+    ap.add_argument("--sizes", default="10000,100000,500000")
+    ap.add_argument("--clusters", type=int, default=50)
+    ap.add_argument("--sample-size", type=int, default=50_000)
+    ap.add_argument("--exact-max", type=int, default=100_000, help="Skip the exact path above this many rows")
+    args = ap.parse_args()
+
+    rows = []
+    for n in [int(s) for s in args.sizes.split(",")]:
+        exact = None
+        if n <= args.exact_max:
+            print(f"⏱️  exact  n={n:,}")
+            exact = run_isolated("exact", n, args.clusters, args.sample_size)
+        print(f"⏱️  large  n={n:,}")
+        large = run_isolated("large", n, args.clusters, args.sample_size)
+
+        for mode, res in (("exact", exact), ("large", large)):
+            if res is None:
+                continue
+            labels = res["labels"]
+            rows.append({
+                "n": n,
+                "mode": mode,
+                "seconds": round(res["seconds"], 2),
+                "peak_rss_mb": round(res["peak_rss_mb"], 1),
+                "clusters": len(set(labels.tolist()) - {-1}),
+                "outlier_share": round(float((labels == -1).mean()), 4),
+                "ari_vs_truth": round(adjusted_rand_score(res["truth"], labels), 4),
+                "ari_vs_exact": round(adjusted_rand_score(exact["labels"], labels), 4) if exact else None,
+            })
+
+    df = pd.DataFrame(rows)
+    print("\n" + df.to_string(index=False))
+    os.makedirs("data", exist_ok=True)
+    out = f"data/bench_clustering_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    df.to_csv(out, index=False)
+    print(f"\n✅ Saved {out}")
+
+
+if __name__ == "__main__":
+    main()
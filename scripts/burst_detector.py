@@ -0,0 +1,212 @@
+# scripts/burst_detector.py
+"""
+Streaming burst detection for topics and keywords.
+
+Each tracked series (topic:<id>, keyword:<kw>) keeps only a tiny state:
+the EWMA mean and variance of its per-bucket article count, the open bucket
+and its running count. Articles are bucketed by published_at (ingested_at
+only when a feed gives no date), so a batch ingested once a day still
+spreads over the hours it was published in. A micro-batch of new
+articles updates that state in O(batch) - no history scan - and a series
+whose open bucket sits `--z` standard deviations above its baseline (with
+the variance floored at the mean, i.e. a Poisson baseline, so rare series
+don't alert on a single article) is reported as a burst, once the series
+has WARMUP_BUCKETS of history.
+
+Inputs are processed once each: keywords from ingest CSVs (matched_keywords),
+topics from clustered CSVs (stable topic ids, see topic_registry.py). By
+default the latest of each from the artifact manifest:
+
+    python scripts/burst_detector.py
+    python scripts/burst_detector.py --keywords-from data/rss_results_<ts>.csv --topics-from ...
+    python scripts/burst_detector.py --bucket-hours 24
+
+The bucket should not be finer than the cadence new data arrives at: hourly
+(default) for the ingest daemon's micro-batches, --bucket-hours 24 for the
+once-a-day pipeline. Each bucket size keeps its own state.
+
+State: data/state/burst_state.json (burst_state_<n>h.json for other bucket
+sizes). Alerts: data/bursts_<timestamp>.csv.
+"""
+
+import argparse
+import json
+import math
+import os
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import artifacts
+from stage_cache import file_digest
+
+STATE_PATH = "data/state/burst_state.json"
+BUCKET_SECONDS = 3600
+ALPHA = 0.05          # EWMA weight of the newest bucket (~20-bucket memory)
+Z_THRESHOLD = 3.0
+MIN_COUNT = 3         # don't alert below this many articles in the bucket
+WARMUP_BUCKETS = 24   # closed buckets a series needs before it can alert
+MAX_CATCHUP = 200     # empty buckets folded one by one; beyond that the baseline is ~0 anyway
+PROCESSED_MAX = 500
+
+
+def state_path(bucket_hours=1):
+    return STATE_PATH if bucket_hours == 1 else STATE_PATH.replace(".json", f"_{bucket_hours:g}h.json")
+
+
+class BurstDetector:
+    def __init__(self, path=STATE_PATH, bucket_seconds=BUCKET_SECONDS, alpha=ALPHA):
+        self.path = path
+        try:
+            with open(path) as f:
+                data = json.load(f)
+        except (FileNotFoundError, ValueError):
+            data = {}
+        self.bucket_seconds = data.get("bucket_seconds", bucket_seconds)
+        self.alpha = data.get("alpha", alpha)
+        self.series = data.get("series", {})
+        self.processed = data.get("processed", [])
+
+    def _fold(self, s, x):
+        """Close a bucket with count x into the EWMA mean/variance."""
+        diff = x - s["mean"]
+        incr = self.alpha * diff
+        s["mean"] += incr
+        s["var"] = (1 - self.alpha) * (s["var"] + diff * incr)
+        s["closed"] += 1
+
+    def _advance(self, s, bucket):
+        """Close buckets up to (not including) `bucket`, folding in empty ones."""
+        if bucket <= s["bucket"]:
+            return
+        self._fold(s, s["count"])
+        gap = bucket - s["bucket"] - 1
+        for _ in range(min(gap, MAX_CATCHUP)):
+            self._fold(s, 0)
+        s["closed"] += max(0, gap - MAX_CATCHUP)
+        s["bucket"], s["count"] = bucket, 0
+
+    @staticmethod
+    def sd(s):
+        # Poisson floor: the spread of a count is at least sqrt(mean), and never below 1
+        return math.sqrt(max(s["var"], s["mean"], 1.0))
+
+    def z(self, s):
+        return (s["count"] - s["mean"]) / self.sd(s)
+
+    def update(self, events, z_threshold=Z_THRESHOLD, min_count=MIN_COUNT):
+        """events: iterable of (series_key, unix_time). Returns burst alerts as dicts."""
+        touched = set()
+        for key, t in events:
+            bucket = int(t // self.bucket_seconds)
+            s = self.series.get(key)
+            if s is None:
+                s = self.series[key] = {"mean": 0.0, "var": 0.0, "bucket": bucket, "count": 0, "closed": 0}
+            self._advance(s, bucket)  # late arrivals just count in the open bucket
+            s["count"] += 1
+            touched.add(key)
+
+        alerts = []
+        for key in sorted(touched):
+            s = self.series[key]
+            z = self.z(s)
+            if (z >= z_threshold and s["count"] >= min_count and s["closed"] >= WARMUP_BUCKETS
+                    and s.get("alerted") != s["bucket"]):
+                s["alerted"] = s["bucket"]
+                kind, _, name = key.partition(":")
+                alerts.append({
+                    "kind": kind,
+                    "series": name,
+                    "bucket_start": datetime.fromtimestamp(s["bucket"] * self.bucket_seconds, timezone.utc).isoformat(),
+                    "count": s["count"],
+                    "baseline_mean": round(s["mean"], 4),
+                    "baseline_sd": round(self.sd(s), 4),
+                    "z": round(z, 2),
+                })
+        return sorted(alerts, key=lambda a: -a["z"])
+
+    # inputs are tracked by content, so archiving a file into a dated folder doesn't re-count it
+    def seen(self, path):
+        return file_digest(path) in self.processed
+
+    def mark(self, path):
+        self.processed = (self.processed + [file_digest(path)])[-PROCESSED_MAX:]
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"bucket_seconds": self.bucket_seconds, "alpha": self.alpha,
+                       "series": self.series, "processed": self.processed}, f)
+        os.replace(tmp, self.path)
+
+
+def _event_times(df):
+    """Publish time of each row, falling back to ingested_at, then to now."""
+    t = pd.Series(pd.NaT, index=df.index, dtype="datetime64[ns, UTC]")
+    for col in ("published_at", "ingested_at"):
+        if col in df.columns:
+            t = t.fillna(pd.to_datetime(df[col], utc=True, errors="coerce"))
+    return t.fillna(pd.Timestamp.now(tz="UTC")).astype("int64") / 1e9
+
+
+def keyword_events(df):
+    if "matched_keywords" not in df.columns:
+        return []
+    times = _event_times(df)
+    kws = df["matched_keywords"].fillna("").astype(str).str.split(",")
+    return [(f"keyword:{kw.strip().lower()}", t)
+            for kw_list, t in zip(kws, times) for kw in kw_list if kw.strip()]
+
+
+def topic_events(df):
+    if "topic" not in df.columns:
+        return []
+    keep = df["topic"] != -1
+    return [(f"topic:{int(tp)}", t) for tp, t in zip(df.loc[keep, "topic"], _event_times(df)[keep])]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Streaming EWMA burst detection for topics and keywords")
+    ap.add_argument("--keywords-from", nargs="+", help="Ingest CSV(s) (default: latest from the artifact manifest)")
+    ap.add_argument("--topics-from", help="Clustered CSV (default: latest from the artifact manifest)")
+    ap.add_argument("--z", type=float, default=Z_THRESHOLD, help="Z-score that counts as a burst")
+    ap.add_argument("--min-count", type=int, default=MIN_COUNT)
+    ap.add_argument("--bucket-hours", type=float, default=BUCKET_SECONDS / 3600,
+                    help="Bucket size; match how often new data arrives (24 for the daily pipeline)")
+    args = ap.parse_args()
+
+    detector = BurstDetector(state_path(args.bucket_hours), bucket_seconds=int(args.bucket_hours * 3600))
+    events, used = [], []
+    sources = [(p, keyword_events) for p in args.keywords_from or [artifacts.resolve("ingest")]]
+    sources.append((args.topics_from or artifacts.resolve("clustered"), topic_events))
+    for path, extract in sources:
+        if not path or detector.seen(path):
+            continue
+        events += extract(pd.read_csv(path))
+        detector.mark(path)
+        used.append(path)
+
+    if not used:
+        print("No new inputs since the last update.")
+        return
+    events.sort(key=lambda e: e[1])
+    alerts = detector.update(events, z_threshold=args.z, min_count=args.min_count)
+    detector.save()
+    print(f"Updated {len(detector.series)} series with {len(events)} events from {len(used)} file(s).")
+
+    if alerts:
+        df = pd.DataFrame(alerts)
+        ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+        out = f"data/bursts_{ts}.csv"
+        os.makedirs("data", exist_ok=True)
+        df.to_csv(out, index=False)
+        artifacts.record("bursts", out, df=df, inputs=used)
+        print(f"🔥 {len(alerts)} bursts (saved {out}):")
+        print(df.head(20).to_string(index=False))
+    else:
+        print("No bursts.")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,20 +2,26 @@
 """
 Calculate weekly Trend Scores for each topic across *all* history.
 
+Topics are the stable ids assigned by cluster_topics.py's topic registry,
+so the same topic keeps its id (and its score_prev) from one fit to the next.
+
 Outputs:
  - data/trend_scores_<timestamp>.csv  (timestamped snapshot)
  - data/trend_scores_latest.csv       (overwrites, for dashboard)
 """
 
-import os, glob
+import os
 from datetime import datetime, timezone
 import pandas as pd
 import numpy as np
 from urllib.parse import urlparse
-from sklearn.preprocessing import MinMaxScaler
+
+import artifacts
+from trend_scoring import score_weeks, weekly_matrices, year_week
 
 # ---------- Load all clustered CSVs ----------
-files = sorted(glob.glob("data/rss_results_clustered_*.csv"))
+# every clustered artifact in the manifest (incl. archived dated folders)
+files = artifacts.history("clustered")
 if not files:
     raise FileNotFoundError("No clustered CSVs found. Run cluster_topics.py first.")
 
@@ -38,6 +44,19 @@ if 'ingested_at' not in df.columns:
 df['ingested_at'] = pd.to_datetime(df['ingested_at'], utc=True, errors='coerce')
 df = df.dropna(subset=['ingested_at'])
 
+# Bin by when the article was published; older files (and undated entries) fall back to ingested_at
+if 'published_at' in df.columns:
+    df['published_at'] = pd.to_datetime(df['published_at'], utc=True, errors='coerce')
+    df['event_time'] = df['published_at'].fillna(df['ingested_at'])
+else:
+    df['event_time'] = df['ingested_at']
+
+# Topic ids are stable across fits (topic_registry.py) only for files clustered with the registry
+n_unstable = df['topic_raw'].isna().sum() if 'topic_raw' in df.columns else len(df)
+if n_unstable:
+    print(f"⚠️ {n_unstable} rows come from files clustered before the topic registry; their topic ids are "
+          "per-fit. Re-cluster them with: python scripts/backfill.py --stages clean,cluster")
+
 # Deduplicate by link + title + topic
 if 'link' in df.columns:
     df = df.drop_duplicates(subset=['link','title','topic'], keep='last')
@@ -54,7 +73,7 @@ elif 'source' not in df.columns:
     df['source'] = "unknown"
 
 # ---------- Define time bins (weeks) ----------
-df['year_week'] = df['ingested_at'].dt.strftime('%Y-%W')  # ISO week
+df['year_week'] = year_week(df['event_time'])
 N_WEEKS = 6  # keep last 6 weeks history
 all_weeks = sorted(df['year_week'].dropna().unique())
 recent_weeks = all_weeks[-N_WEEKS:]
@@ -63,64 +82,26 @@ print("\n🔎 Distinct weeks in dataset:")
 print(df['year_week'].value_counts())
 print("Weeks considered (up to last N):", recent_weeks)
 
-# ---------- Aggregate mentions ----------
-group = df.groupby(['topic','year_week']).size().rename('mentions').reset_index()
-group_source = df.groupby(['topic','year_week','source']).size().rename('mentions_by_source').reset_index()
-
 latest_week = recent_weeks[-1]
-prev_week = recent_weeks[-2] if len(recent_weeks) >= 2 else None
-
-mentions_this = group[group['year_week'] == latest_week].set_index('topic')['mentions'].to_dict()
-mentions_prev = group[group['year_week'] == prev_week].set_index('topic')['mentions'].to_dict() if prev_week else {}
-src_counts = group_source[group_source['year_week'] == latest_week].groupby('topic')['source'].nunique().to_dict()
-
-# ---------- Compute Trend Metrics ----------
-topics = sorted(set(group['topic'].unique()))
-rows = []
-for topic in topics:
-    this_count = int(mentions_this.get(topic, 0))
-    prev_count = int(mentions_prev.get(topic, 0)) if prev_week else 0
-    denom = max(1, prev_count)
-    velocity = (this_count - prev_count) / denom
-    recency = 2 * this_count + prev_count
-    source_count = int(src_counts.get(topic, 0))
-    examples = df[(df['topic']==topic) & (df['year_week']==latest_week)]
-    rep_headlines = examples['title'].dropna().astype(str).unique().tolist()[:3]
-    rows.append({
-        'topic': topic,
-        'mentions_this_week': this_count,
-        'mentions_prev_week': prev_count,
-        'velocity': velocity,
-        'recency': recency,
-        'source_count': source_count,
-        'rep_headlines': " || ".join(rep_headlines)
-    })
-
-metrics_df = pd.DataFrame(rows)
-
-# ---------- Normalize metrics ----------
-v = np.clip(metrics_df['velocity'].fillna(0).values.reshape(-1,1), -5, 5)
-v_shifted = v - v.min()
-r = metrics_df['recency'].fillna(0).values.reshape(-1,1)
-s = metrics_df['source_count'].fillna(0).values.reshape(-1,1)
-
-scaler = MinMaxScaler()
-metrics_df['velocity_norm'] = scaler.fit_transform(v_shifted).flatten()
-metrics_df['recency_norm'] = scaler.fit_transform(r).flatten()
-metrics_df['source_norm'] = scaler.fit_transform(s).flatten()
-
-# ---------- Combine into Trend Score ----------
-W_V, W_R, W_S = 0.4, 0.3, 0.3
-metrics_df['trend_score'] = (
-    W_V * metrics_df['velocity_norm'] +
-    W_R * metrics_df['recency_norm'] +
-    W_S * metrics_df['source_norm']
-) * 100
+
+# ---------- Compute Trend Metrics (vectorized, see trend_scoring.py) ----------
+mentions, sources = weekly_matrices(df, 'topic', source_col='source')
+metrics_df = score_weeks(mentions, sources, weeks=[latest_week]).drop(columns='year_week')
+
+headlines = (df[df['year_week'] == latest_week].dropna(subset=['title'])
+             .assign(title=lambda d: d['title'].astype(str))
+             .drop_duplicates(subset=['topic', 'title'])
+             .groupby('topic')['title'].apply(lambda t: " || ".join(t.head(3))))
+metrics_df.insert(metrics_df.columns.get_loc('source_count') + 1, 'rep_headlines',
+                  metrics_df['topic'].map(headlines).fillna(""))
 
 # ---------- Compare to previous snapshot ----------
+# the last snapshot of an earlier run, not trend_scores_latest.csv, which a failed
+# run may already have overwritten with this run's own scores
 latest_path = "data/trend_scores_latest.csv"
-if os.path.exists(latest_path):
-    prev = pd.read_csv(latest_path).set_index('topic')['trend_score'].to_dict()
+prev_path = artifacts.previous("trend_scores")
+if prev_path and os.path.exists(prev_path):
+    prev = pd.read_csv(prev_path).set_index('topic')['trend_score'].to_dict()
     metrics_df['score_prev'] = metrics_df['topic'].map(prev)
     metrics_df['score_delta'] = metrics_df['trend_score'] - metrics_df['score_prev']
 else:
@@ -133,6 +114,7 @@ ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
 out_file = f"data/trend_scores_{ts}.csv"
 metrics_df.to_csv(out_file, index=False)
 metrics_df.to_csv(latest_path, index=False)
+artifacts.record("trend_scores", out_file, df=metrics_df, inputs=files + ([prev_path] if prev_path else []))
 print(f"\n✅ Saved trend scores: {out_file} and {latest_path}")
 
 # ---------- Quick terminal check ----------
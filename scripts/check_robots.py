@@ -1,13 +1,15 @@
 # check_robots.py
-from urllib import robotparser
+"""
+Check URLs against the shared robots.txt cache used by the scrapers and ingest.
 
-robots_url = "https://www.modaoperandi.com/robots.txt"
-rp = robotparser.RobotFileParser()
-rp.set_url(robots_url)
-rp.read()
+    python scripts/check_robots.py https://www.modaoperandi.com/new https://www.farfetch.com/...
+"""
+import sys
 
-test_url = "https://www.net-a-porter.com/en-es/shop/new-in"  # replace with real product URL
-# Check whether the generic crawler *"*"* may fetch it
-print("Allowed for '*':", rp.can_fetch("*", test_url))
-# If you plan to identify as a specific UA, check that too:
-print("Allowed for 'MyScraper':", rp.can_fetch("MyScraper", test_url))
\ No newline at end of file
+from fetching import ROBOTS_AGENT, robots, scheduler
+
+urls = sys.argv[1:] or ["https://www.modaoperandi.com/new"]
+for url in urls:
+    print(url)
+    print(f"  Allowed for '{ROBOTS_AGENT}':", robots.can_fetch(url))
+    print("  robots.txt delay:", robots.delay(url), "-> effective delay:", scheduler.delay_for(url), "s")
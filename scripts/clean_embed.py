@@ -2,48 +2,37 @@
 import pandas as pd
 import spacy
 from sentence_transformers import SentenceTransformer
-import numpy as np
 import os
 from datetime import datetime, timezone
-import glob
-import re
 import sys
+import argparse
+
+import artifacts
+from embed_scheduler import embed_texts, format_stats
+from emb_store import DTYPES, save_embeddings
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--token-budget", type=int, default=8192, help="Max padded tokens per embedding batch")
+ap.add_argument("--workers", type=int, default=1, help="CPU processes for embedding")
+ap.add_argument("--input", nargs="+", help="Raw ingest CSV(s) (default: latest from the artifact manifest)")
+ap.add_argument("--out-dir", default="data", help="Where to write the cleaned CSV (embeddings always go to models/)")
+ap.add_argument("--timestamp", help="Output timestamp (default: now)")
+ap.add_argument("--emb-dtype", choices=DTYPES, default="float32",
+                help="On-disk embedding precision (float16 = 2x, int8 = 4x smaller; see emb_store.py)")
+args = ap.parse_args()
 
 nlp = spacy.load("en_core_web_sm", disable=["parser", "ner"])
-embed_model = SentenceTransformer("all-MiniLM-L6-v2")  # small & fast
-
-def find_latest_raw_ingest():
-    """Prefer files exactly like rss_results_YYYYMMDD_HHMMSS.csv (raw ingest files).
-       If none found, fallback to newest rss_results_*.csv that contains 'ingested_at' column.
-    """
-    files = sorted(glob.glob("data/rss_results_*.csv"))
-    if not files:
-        raise FileNotFoundError("No files matching data/rss_results_*.csv found. Run ingest_rss.py first.")
-    # Prefer strictly-named raw ingest files
-    ingest_pattern = re.compile(r"rss_results_\d{8}_\d{6}\.csv$")
-    raw_candidates = [f for f in files if ingest_pattern.search(os.path.basename(f))]
-    if raw_candidates:
-        return sorted(raw_candidates)[-1]
-    # Fallback: pick newest file that actually contains an ingested_at header
-    for f in sorted(files, reverse=True):
-        try:
-            cols = pd.read_csv(f, nrows=0).columns.tolist()
-            if "ingested_at" in cols:
-                return f
-        except Exception:
-            continue
-    # nothing found
-    raise FileNotFoundError("No RSS ingest file with ingested_at found. Run ingest_rss.py and try again.")
-
-# choose input file robustly
-try:
-    latest_file = find_latest_raw_ingest()
-except FileNotFoundError as e:
-    print("ERROR:", e)
+EMBED_MODEL_NAME = "all-MiniLM-L6-v2"  # small & fast
+embed_model = SentenceTransformer(EMBED_MODEL_NAME)
+
+# choose input file: latest raw ingest from the artifact manifest
+input_files = args.input or [artifacts.resolve("ingest")]
+if input_files[0] is None:
+    print("ERROR: No RSS ingest file found. Run ingest_rss.py first.")
     sys.exit(1)
 
-print("Using input file:", latest_file)
-df = pd.read_csv(latest_file)
+print("Using input file(s):", ", ".join(input_files))
+df = pd.concat([pd.read_csv(f) for f in input_files], ignore_index=True)
 
 def clean_text(text):
     doc = nlp(text)
@@ -53,26 +42,26 @@ def clean_text(text):
 # clean text
 df['text_clean'] = (df['title'].fillna("") + " " + df['summary'].fillna("")).apply(clean_text)
 
-# embed in batches
-texts = df['text_clean'].astype(str).tolist()
-embeddings = embed_model.encode(
-    texts, show_progress_bar=True, convert_to_numpy=True, batch_size=32
+# embed: dedup, length-bucketed batches under a token budget, scattered back to row order
+texts = df['text_clean'].fillna("").astype(str).tolist()
+embeddings, embed_stats = embed_texts(
+    embed_model, texts, token_budget=args.token_budget, workers=args.workers, model_name=EMBED_MODEL_NAME
 )
+print("Embedding:", format_stats(embed_stats))
 
 # save with timestamp
 os.makedirs("models", exist_ok=True)
-os.makedirs("data", exist_ok=True)
-timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+os.makedirs(args.out_dir, exist_ok=True)
+timestamp = args.timestamp or datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
 
-emb_path = f"models/embeddings_{timestamp}.npy"
-csv_path = f"data/rss_results_with_clean_{timestamp}.csv"
+csv_path = os.path.join(args.out_dir, f"rss_results_with_clean_{timestamp}.csv")
 
-np.save(emb_path, embeddings)
+emb_path = save_embeddings(f"models/embeddings_{timestamp}", embeddings, dtype=args.emb_dtype)
 
 # ✅ keep important columns including ingested_at (if present)
 cols_to_keep = [c for c in df.columns if c in [
     'title', 'summary', 'link', 'matched_keywords', 'tags',
-    'ingested_at', 'text_clean'
+    'published_at', 'ingested_at', 'text_clean'
 ]]
 # if ingested_at was missing from the input, this will simply omit it and we warn
 if 'ingested_at' not in df.columns:
@@ -80,6 +69,12 @@ if 'ingested_at' not in df.columns:
 df_out = df[cols_to_keep]
 
 df_out.to_csv(csv_path, index=False)
+
+# lineage: cleaned CSV <- raw ingest, embeddings <- cleaned CSV (row-aligned)
+artifacts.record("clean", csv_path, df=df_out, inputs=input_files)
+artifacts.record("embeddings", emb_path, rows=len(embeddings),
+                 schema={"dtype": args.emb_dtype, "shape": list(embeddings.shape)},
+                 inputs=[csv_path])
 print(f"Saved {csv_path} and {emb_path} (ingested_at preserved if present)")
 
 
@@ -2,55 +2,141 @@
 import numpy as np
 import pandas as pd
 from bertopic import BERTopic
-from umap import UMAP
-from hdbscan import HDBSCAN
-import os, glob
+import os
+import sys
+import argparse
 
-# 🔑 Find the latest cleaned CSV
-clean_files = glob.glob("data/rss_results_with_clean_*.csv")
-if not clean_files:
+import artifacts
+from emb_store import CompactEmbeddings, load_embeddings
+from scalable_cluster import exact_models, fit_topic_model_large, large_models, sample_indices, topic_centroids
+import topic_registry
+
+ap = argparse.ArgumentParser()
+ap.add_argument("--input", help="Cleaned CSV (default: latest from the artifact manifest)")
+ap.add_argument("--out-dir", help="Where to write outputs (default: data/)")
+ap.add_argument("--no-save-model", action="store_true", help="Don't overwrite models/bertopic_model (backfill)")
+ap.add_argument("--no-carry-over", action="store_true",
+                help="Cluster this input alone; don't use or extend the small-batch backlog (backfill)")
+ap.add_argument("--large", action="store_true",
+                help="Large-corpus mode: PCA + approximate kNN, fit on a sample, assign the rest")
+ap.add_argument("--sample-size", type=int, default=50_000, help="Rows to fit on in --large mode")
+ap.add_argument("--pca-components", type=int, default=50)
+ap.add_argument("--min-similarity", type=float, default=topic_registry.MIN_SIMILARITY,
+                help="Cosine similarity needed to keep a registry topic id (see topic_registry.py)")
+args = ap.parse_args()
+
+# 🔑 Latest cleaned CSV from the artifact manifest
+latest_clean = args.input or artifacts.resolve("clean")
+if latest_clean is None:
     raise FileNotFoundError("No cleaned RSS results files found in data/")
-latest_clean = sorted(clean_files)[-1]
 print("Using input file:", latest_clean)
 df = pd.read_csv(latest_clean)
 
-# 🔑 Find the latest embeddings file
-emb_files = glob.glob("models/embeddings_*.npy")
-if not emb_files:
+# 🔑 The embeddings written for that exact CSV (falls back to newest for legacy files)
+latest_emb = artifacts.derived(latest_clean, "embeddings") or artifacts.resolve("embeddings")
+if latest_emb is None:
     raise FileNotFoundError("No embeddings files found in models/")
-latest_emb = sorted(emb_files)[-1]
 print("Using embeddings:", latest_emb)
-emb = np.load(latest_emb)
+emb = load_embeddings(latest_emb)  # float32 / float16 / int8+scales
+print(f"Embeddings: {emb.shape[0]} x {emb.shape[1]} {emb.dtype} ({emb.nbytes / 1e6:.1f} MB)")
+if emb.shape[0] != len(df):
+    # e.g. an archived clean CSV without recorded embeddings falls back to the newest ones
+    raise ValueError(f"{latest_emb} has {emb.shape[0]} rows but {latest_clean} has {len(df)}; "
+                     "re-run clean_embed.py on its input (backfill: --stages clean,cluster)")
+
+# Incremental ingest can hand us a handful of new articles; UMAP/HDBSCAN need more. Batches
+# too small to cluster are carried over (rows + embeddings, so archiving the CSV doesn't lose
+# them) and clustered together with the next input once there are MIN_DOCS.
+MIN_DOCS = 20
+BACKLOG_CSV = "data/state/cluster_backlog.csv"
+BACKLOG_EMB = "data/state/cluster_backlog.npy"
+
+if not args.no_carry_over and os.path.exists(BACKLOG_CSV) and os.path.exists(BACKLOG_EMB):
+    backlog_df, backlog_emb = pd.read_csv(BACKLOG_CSV), np.load(BACKLOG_EMB)
+    if len(backlog_df) == len(backlog_emb) and backlog_emb.shape[1] == emb.shape[1]:
+        if 'link' in df.columns and 'link' in backlog_df.columns:  # same input re-run (e.g. --resume)
+            keep = ~backlog_df['link'].isin(df['link']).to_numpy()
+            backlog_df, backlog_emb = backlog_df[keep], backlog_emb[keep]
+        print(f"Including {len(backlog_df)} carried-over documents from earlier small batches")
+        df = pd.concat([backlog_df, df], ignore_index=True)
+        emb = CompactEmbeddings(np.vstack([backlog_emb.astype(np.float32), emb.to_float32()]))
+    else:
+        print("⚠️ Carried-over batch doesn't match these embeddings (model changed?); dropping it")
 
-# Optional: configure UMAP and HDBSCAN
-umap_model = UMAP(n_neighbors=15, n_components=5, metric='cosine', random_state=42)
-hdbscan_model = HDBSCAN(min_cluster_size=5, metric='euclidean', cluster_selection_method='eom')
+docs = df['text_clean'].astype(str).tolist()
+
+if len(docs) < MIN_DOCS and args.no_carry_over:
+    print(f"⚠️ Only {len(docs)} documents (< {MIN_DOCS}); skipping clustering.")
+    sys.exit(0)
+if len(docs) < MIN_DOCS:
+    os.makedirs(os.path.dirname(BACKLOG_CSV), exist_ok=True)
+    df.to_csv(BACKLOG_CSV, index=False)
+    np.save(BACKLOG_EMB, emb.to_float32())
+    print(f"⚠️ Only {len(docs)} documents (< {MIN_DOCS}); carried over to the next run, previous outputs stay latest.")
+    sys.exit(0)
+
+# Configure UMAP and HDBSCAN (see scalable_cluster.py for the --large variant)
+if args.large:
+    n_fit = len(sample_indices(len(docs), args.sample_size))
+    umap_model, hdbscan_model = large_models(n_fit, pca_components=args.pca_components, n_features=emb.shape[1])
+    print(f"Large mode: fitting on {n_fit} of {len(docs)} rows")
+else:
+    umap_model, hdbscan_model = exact_models()
 
 # Fit BERTopic
 topic_model = BERTopic(umap_model=umap_model, hdbscan_model=hdbscan_model, calculate_probabilities=False)
-topics, probs = topic_model.fit_transform(df['text_clean'].astype(str).tolist(), embeddings=emb)
+if args.large:
+    topics = fit_topic_model_large(topic_model, docs, emb, sample_size=args.sample_size)
+else:
+    topics, probs = topic_model.fit_transform(docs, embeddings=emb.to_float32())
 
-df['topic'] = topics
+# 🔑 Stable ids: match this fit's topic centroids to the persistent registry
+topics = np.asarray(topics)
+centroids, raw_ids = topic_centroids(emb, topics)
+terms = {t: [w for w, _ in (topic_model.get_topic(t) or [])] for t in raw_ids.tolist()}
+sizes = pd.Series(topics).value_counts().to_dict()
+day = str(df['ingested_at'].max())[:10] if 'ingested_at' in df.columns else None
+with topic_registry.locked() as registry:
+    known_before = registry.next_id
+    mapping = registry.assign(centroids, raw_ids, terms=terms, sizes=sizes, day=day,
+                              min_similarity=args.min_similarity)
+n_new = registry.next_id - known_before
+print(f"Topic registry: {len(raw_ids)} topics, {len(raw_ids) - n_new} matched to existing ids, {n_new} new")
 
-# Save topics summary
+df['topic_raw'] = topics
+df['topic'] = pd.Series(topics).map(mapping).to_numpy()
+
+# Save topics summary (Topic = stable id, Topic_raw = this fit's id)
 topics_info = topic_model.get_topic_info()
-os.makedirs("models", exist_ok=True)
-topic_model.save("models/bertopic_model")
+topics_info.insert(1, 'Topic_raw', topics_info['Topic'])
+topics_info['Topic'] = topics_info['Topic'].map(mapping)
+if not args.no_save_model:
+    os.makedirs("models", exist_ok=True)
+    topic_model.save("models/bertopic_model")
 
 # 🔑 Preserve columns
 cols_to_keep = [c for c in df.columns if c in [
     'title', 'summary', 'link', 'matched_keywords', 'tags',
-    'ingested_at', 'image_url', 'text_clean', 'topic'
+    'published_at', 'ingested_at', 'image_url', 'text_clean', 'topic', 'topic_raw'
 ]]
 df_out = df[cols_to_keep]
 
 # Save with timestamp
 timestamp = os.path.basename(latest_clean).split("_")[-1].replace(".csv", "")
-clustered_path = f"data/rss_results_clustered_{timestamp}.csv"
-topics_info_path = f"data/topic_info_{timestamp}.csv"
+out_dir = args.out_dir or "data"
+os.makedirs(out_dir, exist_ok=True)
+clustered_path = os.path.join(out_dir, f"rss_results_clustered_{timestamp}.csv")
+topics_info_path = os.path.join(out_dir, f"topic_info_{timestamp}.csv")
 
 df_out.to_csv(clustered_path, index=False)
 topics_info.to_csv(topics_info_path, index=False)
+artifacts.record("clustered", clustered_path, df=df_out, inputs=[latest_clean, latest_emb])
+artifacts.record("topic_info", topics_info_path, df=topics_info, inputs=[clustered_path])
+
+# the carried-over rows are in this output now
+for path in (BACKLOG_CSV, BACKLOG_EMB):
+    if not args.no_carry_over and os.path.exists(path):
+        os.remove(path)
 
 print(f"✅ Clustering complete. Saved {clustered_path} and {topics_info_path} (ingested_at preserved).")
 
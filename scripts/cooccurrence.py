@@ -0,0 +1,249 @@
+# scripts/cooccurrence.py
+"""
+Persistent, incrementally updated co-occurrence of keywords, tag categories
+and topics, bucketed by week.
+
+Terms are namespaced kw:<matched keyword>, cat:<tag category> and
+topic:<stable topic id>. For every week there is one sparse symmetric
+term x term count matrix (scipy.sparse CSR) whose diagonal is the number of
+articles carrying the term. Each tagged CSV adds keyword x keyword,
+keyword x category and category x category pairs; each clustered CSV adds
+keyword x topic pairs. Updates touch only the new rows, and inputs are
+tracked by content digest so a file is never counted twice.
+
+    python scripts/cooccurrence.py                        # add the latest tagged + clustered files
+    python scripts/cooccurrence.py --query sustainability --by lift --weeks 4
+    python scripts/cooccurrence.py --query cat:sustainability --kind kw --by pmi
+
+Stored in data/state/cooccurrence/ (vocab.json + one <year-week>.npz per week).
+"""
+
+import argparse
+import ast
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import artifacts
+from stage_cache import file_digest
+from trend_scoring import year_week
+
+STORE_DIR = "data/state/cooccurrence"
+KINDS = ("kw", "cat", "topic")
+PROCESSED_MAX = 1000
+
+
+def _parse_tags(value):
+    if isinstance(value, str) and value.startswith("["):
+        try:
+            return [str(t) for t in ast.literal_eval(value)]
+        except (ValueError, SyntaxError):
+            return []
+    return []
+
+
+def _keywords(value):
+    return [k.strip().lower() for k in str(value).split(",") if k.strip()] if isinstance(value, str) else []
+
+
+def _weeks(df):
+    t = pd.to_datetime(df["ingested_at"], utc=True, errors="coerce") if "ingested_at" in df.columns else None
+    if "published_at" in df.columns:
+        pub = pd.to_datetime(df["published_at"], utc=True, errors="coerce")
+        t = pub if t is None else pub.fillna(t)
+    if t is None:
+        t = pd.Series(pd.Timestamp.now(tz="UTC"), index=df.index)
+    return year_week(t.fillna(pd.Timestamp.now(tz="UTC")))
+
+
+class CooccurrenceStore:
+    def __init__(self, store_dir=STORE_DIR):
+        self.dir = store_dir
+        try:
+            with open(os.path.join(store_dir, "vocab.json")) as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            meta = {}
+        self.terms = meta.get("terms", [])
+        self.index = {t: i for i, t in enumerate(self.terms)}
+        self.n_docs = meta.get("n_docs", {})       # week -> articles from tagged files
+        self.processed = meta.get("processed", [])
+        self._weeks = {}                           # week -> CSR, loaded lazily
+        self._dirty = set()
+
+    # ---------- storage ----------
+
+    def weeks(self):
+        on_disk = {os.path.basename(p)[:-4] for p in glob.glob(os.path.join(self.dir, "*.npz"))}
+        return sorted(on_disk | set(self._weeks))
+
+    def matrix(self, week):
+        n = len(self.terms)
+        m = self._weeks.get(week)
+        if m is None:
+            path = os.path.join(self.dir, f"{week}.npz")
+            m = sparse.load_npz(path).tocsr() if os.path.exists(path) else sparse.csr_matrix((n, n), dtype=np.int32)
+            self._weeks[week] = m
+        if m.shape[0] < n:  # vocabulary grew since this week was written
+            m = self._weeks[week] = sparse.csr_matrix((m.data, m.indices, np.pad(m.indptr, (0, n - m.shape[0]), mode="edge")),
+                                                      shape=(n, n))
+        return m
+
+    def save(self):
+        os.makedirs(self.dir, exist_ok=True)
+        for week in self._dirty:
+            sparse.save_npz(os.path.join(self.dir, f"{week}.npz"), self.matrix(week))
+        tmp = os.path.join(self.dir, "vocab.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump({"terms": self.terms, "n_docs": self.n_docs, "processed": self.processed}, f)
+        os.replace(tmp, os.path.join(self.dir, "vocab.json"))
+        self._dirty.clear()
+
+    # ---------- updates ----------
+
+    def _ids(self, terms):
+        for t in terms:
+            if t not in self.index:
+                self.index[t] = len(self.terms)
+                self.terms.append(t)
+        return [self.index[t] for t in terms]
+
+    def add_documents(self, weeks, docs, pair_filter=None):
+        """Accumulate per-document term lists into the weekly matrices.
+
+        docs[i] is the list of namespaced terms of article i (week weeks[i]).
+        pair_filter(a, b) can restrict which off-diagonal pairs are counted;
+        diagonal (document frequency) entries are added only for terms whose
+        kind passes `pair_filter(t, t)`.
+        """
+        coords = {}
+        for week, terms in zip(weeks, docs):
+            terms = sorted(set(terms))
+            ids = self._ids(terms)
+            rows, cols = coords.setdefault(week, ([], []))
+            for i, a in enumerate(terms):
+                for j, b in enumerate(terms):
+                    if pair_filter is None or pair_filter(a, b):
+                        rows.append(ids[i])
+                        cols.append(ids[j])
+        n = len(self.terms)
+        for week, (rows, cols) in coords.items():
+            if not rows:
+                continue
+            add = sparse.coo_matrix((np.ones(len(rows), dtype=np.int32), (rows, cols)), shape=(n, n)).tocsr()
+            self._weeks[week] = self.matrix(week) + add
+            self._dirty.add(week)
+
+    def add_tagged(self, df):
+        weeks = _weeks(df).tolist()
+        docs = [[f"kw:{k}" for k in _keywords(kws)] + [f"cat:{c}" for c in _parse_tags(tags)]
+                for kws, tags in zip(df.get("matched_keywords", pd.Series(index=df.index, dtype=object)),
+                                     df.get("tags", pd.Series(index=df.index, dtype=object)))]
+        self.add_documents(weeks, docs)
+        for week, n in pd.Series(weeks).value_counts().items():
+            self.n_docs[week] = self.n_docs.get(week, 0) + int(n)
+
+    def add_clustered(self, df):
+        """keyword x topic pairs (and topic document counts); keyword pairs come from tagged files."""
+        if "topic" not in df.columns:
+            return
+        docs = [[f"kw:{k}" for k in _keywords(kws)] + ([f"topic:{int(tp)}"] if tp != -1 else [])
+                for kws, tp in zip(df.get("matched_keywords", pd.Series(index=df.index, dtype=object)), df["topic"])]
+        is_topic = lambda t: t.startswith("topic:")
+        self.add_documents(_weeks(df).tolist(), docs, pair_filter=lambda a, b: is_topic(a) or is_topic(b))
+
+    def seen(self, path):
+        return file_digest(path) in self.processed
+
+    def mark(self, path):
+        self.processed = (self.processed + [file_digest(path)])[-PROCESSED_MAX:]
+
+    # ---------- queries ----------
+
+    def resolve(self, term):
+        """'sustainability' -> first of kw:/cat:/topic: that exists; namespaced terms pass through."""
+        if term in self.index:
+            return term
+        for kind in KINDS:
+            if f"{kind}:{term.lower()}" in self.index:
+                return f"{kind}:{term.lower()}"
+        return None
+
+    def total(self, weeks=None):
+        """Summed matrix and article count over the given weeks (default: all)."""
+        weeks = self.weeks() if weeks is None else weeks
+        n = len(self.terms)
+        total = sparse.csr_matrix((n, n), dtype=np.int64)
+        for w in weeks:
+            total = total + self.matrix(w)
+        return total, sum(self.n_docs.get(w, 0) for w in weeks)
+
+    def top_associated(self, term, k=10, weeks=None, by="count", kind=None, min_count=2):
+        """DataFrame of the terms most associated with `term` by count, lift or PMI."""
+        term = self.resolve(term)
+        if term is None:
+            return pd.DataFrame(columns=["term", "count", "lift", "pmi"])
+        total, n_docs = self.total(weeks)
+        diag = total.diagonal().astype(float)
+        i = self.index[term]
+        row = total.getrow(i)
+        cols, counts = row.indices, row.data.astype(float)
+        keep = (cols != i) & (counts >= min_count)
+        if kind:
+            keep &= np.array([self.terms[c].startswith(kind + ":") for c in cols], dtype=bool)
+        cols, counts = cols[keep], counts[keep]
+        n = max(n_docs, 1)
+        lift = counts * n / np.maximum(diag[i] * diag[cols], 1)
+        out = pd.DataFrame({
+            "term": [self.terms[c] for c in cols],
+            "count": counts.astype(int),
+            "lift": lift,
+            "pmi": np.log2(np.maximum(lift, 1e-12)),
+        })
+        return out.sort_values([by, "count"], ascending=False).head(k).reset_index(drop=True)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Weekly keyword / category / topic co-occurrence")
+    ap.add_argument("--tagged", help="Tagged CSV to add (default: latest from the artifact manifest)")
+    ap.add_argument("--clustered", help="Clustered CSV to add (default: latest from the artifact manifest)")
+    ap.add_argument("--query", help="Term to find associations for (kw:/cat:/topic: prefix optional)")
+    ap.add_argument("--by", choices=["count", "lift", "pmi"], default="lift")
+    ap.add_argument("--kind", choices=KINDS, help="Only return associated terms of this kind")
+    ap.add_argument("--weeks", type=int, help="Only the last N weeks (default: all)")
+    ap.add_argument("--k", type=int, default=15)
+    ap.add_argument("--min-count", type=int, default=2)
+    args = ap.parse_args()
+
+    store = CooccurrenceStore()
+
+    if not args.query:
+        added = []
+        for path, add in ((args.tagged or artifacts.resolve("tagged"), store.add_tagged),
+                          (args.clustered or artifacts.resolve("clustered"), store.add_clustered)):
+            if path and not store.seen(path):
+                add(pd.read_csv(path))
+                store.mark(path)
+                added.append(path)
+        store.save()
+        print(f"✅ Co-occurrence updated from {len(added)} new file(s): {len(store.terms)} terms, "
+              f"{len(store.weeks())} weeks")
+        return
+
+    weeks = store.weeks()[-args.weeks:] if args.weeks else None
+    res = store.top_associated(args.query, k=args.k, weeks=weeks, by=args.by, kind=args.kind,
+                               min_count=args.min_count)
+    if res.empty:
+        print(f"No associations for {args.query!r}.")
+        return
+    print(f"Terms most associated with {store.resolve(args.query)} by {args.by}"
+          f"{f' over the last {args.weeks} weeks' if args.weeks else ''}:")
+    print(res.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+# scripts/doc_term.py
+"""
+Shared sparse document-term matrix over text_clean.
+
+clean_embed.py already lemmatizes, lowercases and drops stopwords, so a
+document's terms are just its text_clean tokens plus their bigrams. This
+module tokenizes each distinct text once, ever:
+ - a persistent store (data/state/doc_term/) holds one CSR row per distinct
+   text (keyed by its SHA-1) and a vocabulary that only grows, so new
+   documents are appended as rows (and new terms as columns) without
+   touching the existing ones
+ - the row list of every input seen so far is cached under the digest of
+   its texts, so asking again for the same CSV is a lookup
+
+Word, bigram and per-topic term frequencies are then sparse reductions
+(column sums, a topic-indicator x DTM product) instead of Counter loops over
+joined strings; analyze_frequencies.py and report.py use them.
+
+    python scripts/doc_term.py                    # build / extend for the latest clustered CSV
+    python scripts/doc_term.py --topics 10        # plus the top terms of each topic
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import artifacts
+
+STORE_DIR = "data/state/doc_term"
+NGRAMS = 2
+INPUTS_MAX = 200  # cached inputs (row lists) kept
+
+
+def doc_terms(text, ngrams=NGRAMS):
+    """Tokens of a cleaned text followed by its 2..ngrams-grams (space-joined)."""
+    tokens = str(text).split()
+    terms = list(tokens)
+    for n in range(2, ngrams + 1):
+        terms += [" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1)]
+    return terms
+
+
+def _key(text):
+    return hashlib.sha1(str(text).encode()).hexdigest()
+
+
+class DocTermStore:
+    def __init__(self, store_dir=STORE_DIR):
+        self.dir = store_dir
+        self.matrix_path = os.path.join(store_dir, "matrix.npz")
+        self.meta_path = os.path.join(store_dir, "meta.json")
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            self.X = sparse.load_npz(self.matrix_path).tocsr()
+        except (FileNotFoundError, ValueError):
+            meta, self.X = {}, None
+        self.vocab = meta.get("vocab", [])
+        self.docs = meta.get("docs", [])          # row -> text key
+        self.inputs = meta.get("inputs", {})      # input digest -> rows
+        self.term_index = {t: i for i, t in enumerate(self.vocab)}
+        self.doc_index = {k: i for i, k in enumerate(self.docs)}
+        if self.X is None or self.X.shape[0] != len(self.docs):
+            self.X, self.docs, self.doc_index, self.inputs = None, [], {}, {}
+        self._dirty = False
+
+    def append(self, texts):
+        """Row ids for texts, tokenizing and appending only the ones not stored yet."""
+        rows, new = [], {}  # new: key -> text, in first-seen order
+        for text in texts:
+            key = _key(text)
+            row = self.doc_index.get(key)
+            if row is None:
+                if key not in new:
+                    new[key] = text
+                    self.doc_index[key] = len(self.docs) + len(new) - 1
+                row = self.doc_index[key]
+            rows.append(row)
+        if new:
+            self._append_rows(list(new), list(new.values()))
+        return rows
+
+    def _append_rows(self, keys, texts):
+        indptr, indices, data = [0], [], []
+        for text in texts:
+            counts = {}
+            for term in doc_terms(text):
+                j = self.term_index.get(term)
+                if j is None:
+                    j = self.term_index[term] = len(self.vocab)
+                    self.vocab.append(term)
+                counts[j] = counts.get(j, 0) + 1
+            indices += counts.keys()
+            data += counts.values()
+            indptr.append(len(indices))
+        n_terms = len(self.vocab)
+        block = sparse.csr_matrix((np.array(data, dtype=np.int32), np.array(indices, dtype=np.int32),
+                                   np.array(indptr)), shape=(len(texts), n_terms))
+        if self.X is None:
+            self.X = block
+        else:
+            # widening a CSR matrix is free: same arrays, more columns
+            old = sparse.csr_matrix((self.X.data, self.X.indices, self.X.indptr), shape=(self.X.shape[0], n_terms))
+            self.X = sparse.vstack([old, block], format="csr")
+        self.docs += keys
+        self._dirty = True
+
+    def for_texts(self, texts):
+        """(CSR [len(texts) x vocab], vocab array) for a list of cleaned texts, cached by their digest."""
+        texts = [t if isinstance(t, str) else "" for t in texts]
+        digest = hashlib.sha1("\x00".join(texts).encode()).hexdigest()
+        rows = self.inputs.get(digest)
+        if rows is None:
+            rows = self.inputs[digest] = self.append(texts)
+            if len(self.inputs) > INPUTS_MAX:
+                self.inputs.pop(next(iter(self.inputs)))
+            self._dirty = True
+        if self.X is None:
+            return sparse.csr_matrix((len(texts), 0), dtype=np.int32), np.array([], dtype=object)
+        return self.X[rows], np.array(self.vocab, dtype=object)
+
+    def save(self):
+        if not self._dirty:
+            return
+        os.makedirs(self.dir, exist_ok=True)
+        if self.X is not None:
+            sparse.save_npz(self.matrix_path + ".tmp.npz", self.X)
+            os.replace(self.matrix_path + ".tmp.npz", self.matrix_path)
+        tmp = self.meta_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"vocab": self.vocab, "docs": self.docs, "inputs": self.inputs}, f)
+        os.replace(tmp, self.meta_path)
+        self._dirty = False
+
+
+def for_frame(df, text_col="text_clean"):
+    """(CSR, vocab) for a DataFrame's cleaned text, built at most once per distinct input."""
+    store = DocTermStore()
+    X, vocab = store.for_texts(df[text_col].tolist())
+    store.save()
+    return X, vocab
+
+
+def term_frequencies(X, vocab, ngram=1):
+    """Series term -> total count over all rows, for terms of exactly `ngram` words, descending."""
+    totals = np.asarray(X.sum(axis=0)).ravel()
+    keep = (np.char.count(vocab.astype(str), " ") == ngram - 1) & (totals > 0)
+    return pd.Series(totals[keep], index=vocab[keep], name="count").sort_values(ascending=False, kind="stable")
+
+
+def topic_term_frequencies(X, vocab, topics, top=10, ngram=1):
+    """DataFrame (topic, term, count) with the `top` terms of each topic (outlier topic -1 excluded)."""
+    topics = np.asarray(topics)
+    labels, inverse = np.unique(topics, return_inverse=True)
+    indicator = sparse.csr_matrix((np.ones(len(topics), dtype=np.int32), (inverse, np.arange(len(topics)))),
+                                  shape=(len(labels), len(topics)))
+    counts = (indicator @ X).tocsr()  # topics x terms in one sparse product
+    is_ngram = np.char.count(vocab.astype(str), " ") == ngram - 1
+    rows = []
+    for i, label in enumerate(labels):
+        if label == -1:
+            continue
+        row = counts.getrow(i)
+        idx, vals = row.indices[is_ngram[row.indices]], row.data[is_ngram[row.indices]]
+        for j in np.argsort(-vals, kind="stable")[:top]:
+            rows.append({"topic": label, "term": vocab[idx[j]], "count": int(vals[j])})
+    return pd.DataFrame(rows, columns=["topic", "term", "count"])
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Build / extend the shared document-term matrix")
+    ap.add_argument("--input", help="Clean or clustered CSV (default: latest clustered from the manifest)")
+    ap.add_argument("--topics", type=int, default=0, help="Also print the top N terms of each topic")
+    args = ap.parse_args()
+
+    path = args.input or artifacts.resolve("clustered")
+    if not path:
+        print("⚠️ No clustered CSV found. Run clean_embed.py → cluster_topics.py first.")
+        return
+    df = pd.read_csv(path)
+    if "text_clean" not in df.columns:
+        print(f"⚠️ {path} has no text_clean column.")
+        return
+
+    store = DocTermStore()
+    before = len(store.docs)
+    X, vocab = store.for_texts(df["text_clean"].tolist())
+    store.save()
+    print(f"✅ {X.shape[0]} documents x {len(vocab)} terms ({len(store.docs) - before} new rows tokenized, "
+          f"store {len(store.docs)} rows, nnz {store.X.nnz if store.X is not None else 0})")
+
+    print("Top words:", term_frequencies(X, vocab).head(10).to_dict())
+    if args.topics and "topic" in df.columns:
+        print(topic_term_frequencies(X, vocab, df["topic"], top=args.topics).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
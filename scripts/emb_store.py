@@ -0,0 +1,114 @@
+# scripts/emb_store.py
+"""
+Embedding storage at reduced precision.
+
+Three on-disk formats, chosen with clean_embed.py --emb-dtype:
+ - float32  models/embeddings_<ts>.npy   (the original format)
+ - float16  models/embeddings_<ts>.npy   (2x smaller)
+ - int8     models/embeddings_<ts>.npz   (4x smaller; q = round(x / scale),
+            one float32 scale per vector = max|x| / 127)
+
+load_embeddings() returns a CompactEmbeddings that keeps the compact array in
+memory and dequantizes only the rows/blocks asked for, so similarity search
+and centroid assignment never materialise the full float32 matrix.
+"""
+
+import numpy as np
+
+DTYPES = ("float32", "float16", "int8")
+DEFAULT_BLOCK = 65_536
+
+
+def quantize_int8(emb):
+    emb = np.asarray(emb, dtype=np.float32)
+    scale = np.abs(emb).max(axis=1) / 127.0
+    scale[scale == 0] = 1.0
+    q = np.clip(np.rint(emb / scale[:, None]), -127, 127).astype(np.int8)
+    return q, scale.astype(np.float32)
+
+
+def save_embeddings(path_stem, emb, dtype="float32"):
+    """Write emb as `dtype`; returns the path written (.npy or .npz)."""
+    if dtype not in DTYPES:
+        raise ValueError(f"dtype must be one of {DTYPES}")
+    if dtype == "int8":
+        q, scale = quantize_int8(emb)
+        path = path_stem + ".npz"
+        np.savez(path, q=q, scale=scale)
+    else:
+        path = path_stem + ".npy"
+        np.save(path, np.asarray(emb, dtype=dtype))
+    return path
+
+
+class CompactEmbeddings:
+    """Row-indexable view over float32/float16/int8 embeddings.
+
+    Indexing (emb[i], emb[a:b], emb[idx_array]) returns float32 rows;
+    everything else stays in the compact dtype.
+    """
+
+    def __init__(self, data, scale=None):
+        self.data = data
+        self.scale = scale
+        self.dtype = str(data.dtype)
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def nbytes(self):
+        return self.data.nbytes + (self.scale.nbytes if self.scale is not None else 0)
+
+    def __getitem__(self, idx):
+        rows = self.data[idx].astype(np.float32)
+        if self.scale is not None:
+            rows *= self.scale[idx][..., None]
+        return rows
+
+    def blocks(self, block_size=DEFAULT_BLOCK):
+        """Yield (start, float32 block) over all rows."""
+        for start in range(0, len(self), block_size):
+            yield start, self[start:start + block_size]
+
+    def to_float32(self):
+        return self[:]
+
+    def norms(self, block_size=DEFAULT_BLOCK):
+        out = np.empty(len(self), dtype=np.float32)
+        for start, block in self.blocks(block_size):
+            out[start:start + len(block)] = np.linalg.norm(block, axis=1)
+        return out
+
+    def cosine_topk(self, queries, k=10, block_size=DEFAULT_BLOCK, norms=None):
+        """Brute-force cosine top-k for each query row: (indices [q, k], sims [q, k])."""
+        queries = np.asarray(queries, dtype=np.float32)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        norms = self.norms(block_size) if norms is None else norms
+        k = min(k, len(self))
+        best_sim = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_idx = np.zeros((len(queries), k), dtype=np.int64)
+        for start, block in self.blocks(block_size):
+            sims = (queries @ block.T) / np.maximum(norms[start:start + len(block)], 1e-12)
+            cand_sim = np.concatenate([best_sim, sims], axis=1)
+            cand_idx = np.concatenate(
+                [best_idx, np.broadcast_to(np.arange(start, start + len(block)), sims.shape)], axis=1
+            )
+            top = np.argpartition(-cand_sim, k - 1, axis=1)[:, :k]
+            best_sim = np.take_along_axis(cand_sim, top, axis=1)
+            best_idx = np.take_along_axis(cand_idx, top, axis=1)
+        order = np.argsort(-best_sim, axis=1)
+        return np.take_along_axis(best_idx, order, axis=1), np.take_along_axis(best_sim, order, axis=1)
+
+
+def load_embeddings(path, mmap=False):
+    """Load any of the stored formats as CompactEmbeddings."""
+    if path.endswith(".npz"):
+        with np.load(path) as z:
+            return CompactEmbeddings(z["q"], z["scale"])
+    return CompactEmbeddings(np.load(path, mmap_mode="r" if mmap else None))
+
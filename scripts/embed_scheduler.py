@@ -0,0 +1,128 @@
+# scripts/embed_scheduler.py
+"""
+Embedding batch scheduler used by clean_embed.py.
+
+Instead of handing every row to encode() in file order with a fixed batch
+size, we:
+ 1. collapse duplicate texts (re-posted headlines) and drop empty ones,
+ 2. sort the unique texts by token length so a batch pads to similar lengths,
+ 3. cut batches under a token budget (batch_size * longest_in_batch), so short
+    texts get big batches and long ones small batches,
+ 4. optionally spread batches across a CPU process pool,
+ 5. scatter the vectors back to the original row order (empty rows -> zeros).
+
+embed_texts() returns (embeddings, stats) where stats reports padding waste
+and sentences/second.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def token_lengths(model, texts):
+    """Token count per text, capped at the model's max_seq_length."""
+    max_len = getattr(model, "max_seq_length", None) or 512
+    tok = getattr(model, "tokenizer", None)
+    if tok is not None:
+        ids = tok(texts, add_special_tokens=True, truncation=True, max_length=max_len)["input_ids"]
+        return np.array([len(x) for x in ids], dtype=np.int64)
+    # rough fallback: ~1.3 word pieces per whitespace token + [CLS]/[SEP]
+    return np.minimum(np.array([int(len(t.split()) * 1.3) + 2 for t in texts], dtype=np.int64), max_len)
+
+
+def plan_batches(lengths, token_budget=8192, max_batch=512):
+    """Split positions (sorted longest first) into batches whose padded size fits token_budget."""
+    order = np.argsort(-lengths, kind="stable")
+    batches, cur, cur_max = [], [], 0
+    for i in order:
+        n = int(lengths[i])
+        if cur and ((len(cur) + 1) * max(cur_max, n) > token_budget or len(cur) >= max_batch):
+            batches.append(cur)
+            cur, cur_max = [], 0
+        cur.append(int(i))
+        cur_max = max(cur_max, n)
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+# ---------- process pool workers ----------
+
+_worker_model = None
+
+
+def _init_worker(model_name):
+    global _worker_model
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_in_worker(texts):
+    return _worker_model.encode(texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False)
+
+
+def embed_texts(model, texts, token_budget=8192, workers=1, model_name=None, verbose=True):
+    """Embed texts via dedup + length-bucketed batches. Returns (embeddings, stats)."""
+    t0 = time.perf_counter()
+    texts = ["" if t is None else str(t).strip() for t in texts]
+
+    # 1) dedup and drop empties; inverse maps every row to its unique slot (-1 = empty)
+    uniq_index = {}
+    inverse = np.full(len(texts), -1, dtype=np.int64)
+    uniq = []
+    for row, t in enumerate(texts):
+        if not t:
+            continue
+        slot = uniq_index.get(t)
+        if slot is None:
+            slot = uniq_index[t] = len(uniq)
+            uniq.append(t)
+        inverse[row] = slot
+
+    dim = model.get_sentence_embedding_dimension()
+    out_unique = np.zeros((len(uniq), dim), dtype=np.float32)
+
+    # 2-3) length buckets under a token budget
+    lengths = token_lengths(model, uniq) if uniq else np.zeros(0, dtype=np.int64)
+    batches = plan_batches(lengths, token_budget=token_budget)
+    real_tokens = int(lengths.sum())
+    padded_tokens = int(sum(len(b) * int(lengths[b].max()) for b in batches))
+
+    # 4) encode, in-process or across a CPU pool
+    if workers > 1 and len(batches) > 1:
+        if not model_name:
+            raise ValueError("model_name is required to load the model in worker processes")
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_name,)) as pool:
+            for b, vecs in zip(batches, pool.map(_encode_in_worker, [[uniq[i] for i in b] for b in batches])):
+                out_unique[b] = vecs
+    else:
+        for n, b in enumerate(batches, 1):
+            out_unique[b] = model.encode([uniq[i] for i in b], batch_size=len(b),
+                                         convert_to_numpy=True, show_progress_bar=False)
+            if verbose and n % 20 == 0:
+                print(f"  embedded batch {n}/{len(batches)}")
+
+    # 5) scatter back to row order; empty texts stay zero vectors
+    embeddings = np.zeros((len(texts), dim), dtype=np.float32)
+    has_text = inverse >= 0
+    embeddings[has_text] = out_unique[inverse[has_text]]
+
+    elapsed = time.perf_counter() - t0
+    stats = {
+        "rows": len(texts),
+        "unique": len(uniq),
+        "empty": int((~has_text).sum()),
+        "batches": len(batches),
+        "padding_waste": 1 - real_tokens / padded_tokens if padded_tokens else 0.0,
+        "seconds": elapsed,
+        "sentences_per_sec": len(uniq) / elapsed if elapsed > 0 else 0.0,
+    }
+    return embeddings, stats
+
+
+def format_stats(stats):
+    return (f"{stats['rows']} rows -> {stats['unique']} unique texts ({stats['empty']} empty) "
+            f"in {stats['batches']} batches, padding waste {stats['padding_waste']:.1%}, "
+            f"{stats['sentences_per_sec']:.1f} sentences/s")
@@ -0,0 +1,93 @@
+# scripts/feed_scheduler.py
+"""
+Adaptive per-feed polling schedule for ingest_rss.py --daemon.
+
+Each feed's update interval is learned from the publish times of the items
+it carries (median gap between recent items), so hourly feeds are polled
+often and weekly Substacks rarely. A poll that finds nothing new backs the
+interval off; a failed fetch backs off exponentially. Everything is clamped
+to [min_interval, max_interval] and persisted in
+data/state/feed_schedule.json so the daemon resumes where it left off.
+"""
+
+import json
+import os
+import statistics
+import time
+
+from watermarks import entry_published
+
+SCHEDULE_PATH = "data/state/feed_schedule.json"
+MIN_INTERVAL = 5 * 60
+MAX_INTERVAL = 24 * 3600
+DEFAULT_INTERVAL = 30 * 60
+IDLE_BACKOFF = 1.5      # interval multiplier after a poll with no new entries
+SMOOTHING = 0.5         # weight of the newly observed gap vs the previous interval
+GAPS_KEPT = 20
+
+
+class FeedSchedule:
+    def __init__(self, path=SCHEDULE_PATH, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL):
+        self.path = path
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        try:
+            with open(path) as f:
+                self.feeds = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.feeds = {}
+
+    def get(self, feed_url):
+        return self.feeds.setdefault(
+            feed_url, {"interval": DEFAULT_INTERVAL, "next_poll": 0.0, "failures": 0, "observed_gap": None}
+        )
+
+    def _clamp(self, seconds):
+        return min(max(seconds, self.min_interval), self.max_interval)
+
+    def due(self, feeds, now=None):
+        now = time.time() if now is None else now
+        return [f for f in feeds if self.get(f)["next_poll"] <= now]
+
+    def next_due_in(self, feeds, now=None):
+        """Seconds until the next feed is due (0 if one already is)."""
+        now = time.time() if now is None else now
+        return max(0.0, min(self.get(f)["next_poll"] for f in feeds) - now) if feeds else self.max_interval
+
+    def observed_gap(self, entries):
+        """Median gap in seconds between the most recent items' publish times, or None."""
+        times = sorted({p.timestamp() for e in entries if (p := entry_published(e))})[-(GAPS_KEPT + 1):]
+        gaps = [b - a for a, b in zip(times, times[1:]) if b > a]
+        return statistics.median(gaps) if gaps else None
+
+    def record_poll(self, feed_url, entries, n_new, now=None):
+        """Update the feed's interval after a successful poll (entries = everything the feed carried)."""
+        now = time.time() if now is None else now
+        s = self.get(feed_url)
+        s["failures"] = 0
+        gap = self.observed_gap(entries)
+        if gap is not None:
+            s["observed_gap"] = gap
+        if n_new and s["observed_gap"]:
+            s["interval"] = self._clamp(SMOOTHING * s["observed_gap"] + (1 - SMOOTHING) * s["interval"])
+        elif not n_new:
+            s["interval"] = self._clamp(s["interval"] * IDLE_BACKOFF)
+        s["next_poll"] = now + s["interval"]
+        s["last_poll"] = now
+
+    def record_unchanged(self, feed_url, now=None):
+        """HTTP 304: same as a poll with nothing new."""
+        self.record_poll(feed_url, [], 0, now)
+
+    def record_failure(self, feed_url, now=None):
+        now = time.time() if now is None else now
+        s = self.get(feed_url)
+        s["failures"] += 1
+        s["next_poll"] = now + self._clamp(self.min_interval * 2 ** s["failures"])
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.feeds, f, indent=2)
+        os.replace(tmp, self.path)
@@ -0,0 +1,231 @@
+# scripts/fetching.py
+"""
+Shared, polite HTTP fetching for the scrapers and ingest_rss.py.
+
+ - one requests.Session per process (keeps connections alive between pages)
+ - robots.txt fetched once per host and cached with a TTL, in memory and in
+   data/state/robots_cache.json so every pipeline step shares it
+ - disallowed URLs are never requested (RobotsDisallowed is raised instead);
+   a robots.txt that can't be fetched (5xx, network error) disallows the
+   whole host until it's retried after ROBOTS_ERROR_TTL (RFC 9309)
+ - a per-host scheduler spaces requests by the site's Crawl-delay /
+   Request-rate, falling back to min_delay when robots.txt doesn't say
+ - a small in-memory LRU cache so a URL is only downloaded once per run
+ - per-host latency / bytes / status metrics (metrics.py)
+"""
+
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from urllib import robotparser
+from urllib.parse import urlparse
+
+import requests
+
+import metrics
+
+HEADERS = {"User-Agent": "Mozilla/5.0 (compatible; TrendScraper/1.0; +youremail@example.com)"}
+ROBOTS_AGENT = "TrendScraper"  # product token matched against robots.txt User-agent lines
+
+ROBOTS_CACHE_PATH = "data/state/robots_cache.json"
+ROBOTS_TTL = 24 * 3600        # seconds before robots.txt is re-fetched
+ROBOTS_ERROR_TTL = 3600       # retry sooner when robots.txt itself failed to load (host disallowed meanwhile)
+
+CACHE_MAX = 256  # responses kept in memory per process
+
+
+class RobotsDisallowed(Exception):
+    """Raised instead of requesting a URL that robots.txt disallows for us."""
+
+
+_session = None
+_cache = OrderedDict()
+_cache_lock = threading.Lock()  # fetch() is called from the feed thread pool
+
+
+def get_session():
+    """Return the process-wide requests.Session (created on first use)."""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        _session.headers.update(HEADERS)
+    return _session
+
+
+def _host_key(url):
+    p = urlparse(url)
+    return f"{p.scheme}://{p.netloc}".lower()
+
+
+class RobotsCache:
+    """robots.txt per host, fetched once and cached (memory + JSON file) for `ttl` seconds."""
+
+    def __init__(self, path=ROBOTS_CACHE_PATH, ttl=ROBOTS_TTL, agent=ROBOTS_AGENT):
+        self.path = path
+        self.ttl = ttl
+        self.agent = agent
+        self._parsers = {}
+        self._lock = threading.Lock()   # guards the dicts and the JSON file
+        self._host_locks = {}           # one robots.txt download per host at a time
+        self._disk = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._disk, f)
+        os.replace(tmp, self.path)
+
+    def _download(self, host):
+        """Return (status, text) following the usual robots.txt conventions."""
+        try:
+            resp = get_session().get(host + "/robots.txt", timeout=10)
+        except requests.RequestException:
+            return "error", ""
+        if resp.status_code in (401, 403):
+            return "deny", ""
+        if 400 <= resp.status_code < 500:
+            return "allow", ""  # no robots.txt = no restrictions
+        if resp.status_code >= 500:
+            return "error", ""
+        return "ok", resp.text
+
+    def parser(self, url):
+        host = _host_key(url)
+        with self._lock:
+            host_lock = self._host_locks.setdefault(host, threading.Lock())
+        # only threads asking about the same host wait for its download
+        with host_lock:
+            now = time.time()
+            with self._lock:
+                rp = self._parsers.get(host)
+                entry = self._disk.get(host)
+            if rp is not None and entry and now - entry["fetched_at"] < entry["ttl"]:
+                return rp
+            if not entry or now - entry["fetched_at"] >= entry["ttl"]:
+                status, text = self._download(host)
+                ttl = ROBOTS_ERROR_TTL if status == "error" else self.ttl
+                entry = {"status": status, "text": text, "fetched_at": now, "ttl": ttl}
+                with self._lock:
+                    self._disk[host] = entry
+                    self._save()
+
+            rp = robotparser.RobotFileParser()
+            if entry["status"] in ("deny", "error"):  # unreachable robots.txt = complete disallow
+                rp.disallow_all = True
+            elif entry["status"] == "allow":
+                rp.allow_all = True
+            else:
+                rp.parse(entry["text"].splitlines())
+            with self._lock:
+                self._parsers[host] = rp
+            return rp
+
+    def can_fetch(self, url):
+        return self.parser(url).can_fetch(self.agent, url)
+
+    def delay(self, url):
+        """Seconds between requests the host asks for, or None if unspecified."""
+        rp = self.parser(url)
+        if rp.allow_all or rp.disallow_all:
+            return None
+        delay = rp.crawl_delay(self.agent)
+        if delay is not None:
+            return float(delay)
+        rate = rp.request_rate(self.agent)
+        if rate is not None and rate.requests:
+            return rate.seconds / rate.requests
+        return None
+
+
+class HostScheduler:
+    """Spaces requests to the same host by its robots.txt delay (or min_delay).
+
+    Different hosts don't wait on each other. Thread-safe: the next free slot
+    per host is reserved under a lock and the sleep happens outside it.
+    """
+
+    def __init__(self, robots, min_delay=1.0, max_delay=60.0):
+        self.robots = robots
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self._next = {}
+        self._lock = threading.Lock()
+
+    def delay_for(self, url):
+        delay = self.robots.delay(url)
+        if delay is None:
+            delay = self.min_delay
+        return min(max(delay, 0.0), self.max_delay)
+
+    def wait(self, url):
+        host = _host_key(url)
+        delay = self.delay_for(url)
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next.get(host, now))
+            self._next[host] = slot + delay
+        if slot > now:
+            time.sleep(slot - now)
+
+
+robots = RobotsCache()
+scheduler = HostScheduler(robots)
+
+
+def set_min_delay(seconds):
+    """Fallback spacing for hosts whose robots.txt has no Crawl-delay."""
+    scheduler.min_delay = seconds
+
+
+def get(url, timeout=12, headers=None):
+    """Robots-checked, host-scheduled GET. Returns the requests.Response."""
+    if not robots.can_fetch(url):
+        raise RobotsDisallowed(f"robots.txt disallows {url}")
+    scheduler.wait(url)
+    labels = {"host": urlparse(url).netloc.lower()}
+    t0 = time.perf_counter()
+    try:
+        resp = get_session().get(url, timeout=timeout, headers=headers)
+    except requests.RequestException:
+        metrics.registry.inc("trend_http_requests_total", {**labels, "status": "error"})
+        raise
+    finally:
+        metrics.registry.observe("trend_http_request_seconds", labels, time.perf_counter() - t0)
+    metrics.registry.inc("trend_http_requests_total", {**labels, "status": str(resp.status_code)})
+    metrics.registry.inc("trend_http_response_bytes_total", labels, len(resp.content))
+    resp.raise_for_status()
+    return resp
+
+
+def fetch(url, timeout=12, use_cache=True):
+    """GET url and return the response text. Raises on HTTP errors / robots disallow."""
+    if use_cache:
+        with _cache_lock:
+            if url in _cache:
+                _cache.move_to_end(url)
+                return _cache[url]
+
+    text = get(url, timeout=timeout).text
+
+    if use_cache:
+        with _cache_lock:
+            _cache[url] = text
+            _cache.move_to_end(url)
+            if len(_cache) > CACHE_MAX:
+                _cache.popitem(last=False)
+    return text
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
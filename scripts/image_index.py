@@ -0,0 +1,366 @@
+# scripts/image_index.py
+"""
+Optional image stage: perceptual hashes of article and product images, with
+sub-linear lookup of visually repeated images across feeds and retailers.
+
+ - images are downloaded concurrently through fetching.get (robots.txt
+   checked, spaced per host by its Crawl-delay / the min delay, so the
+   thread pool never hammers one site) into a bounded on-disk cache
+   (data/state/image_cache/, least recently used files evicted first)
+ - a 64-bit difference hash (dHash: 9x8 grayscale, one bit per horizontal
+   gradient) is computed in a process pool as soon as each download
+   completes, with the cached file pinned until then so eviction can't
+   remove it first; it survives resizing, recompression and small crops,
+   so the same product shot on two sites lands within a few bits
+ - hashes are kept per URL in data/state/image_index.json and searched with
+   a BK-tree on Hamming distance, so a lookup visits a small fraction of the
+   index instead of comparing against every image seen so far
+
+Each run hashes only URLs not indexed yet (latest clustered CSV: image_url
+of articles, source = feed host; latest retailer delta CSVs: arrivals and
+returns, source = retailer) and writes their near-duplicates - within the
+batch or against history - to data/image_matches_<timestamp>.csv.
+
+    python scripts/image_index.py
+    python scripts/image_index.py --radius 4 --max-concurrent 16 --cache-mb 1024
+
+Needs Pillow (pip install Pillow); no GPU.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from urllib.parse import urlparse
+
+import numpy as np
+import pandas as pd
+import requests
+
+import artifacts
+import metrics
+from fetching import RobotsDisallowed, get
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+CACHE_DIR = "data/state/image_cache"
+CACHE_MAX_MB = 512
+INDEX_PATH = "data/state/image_index.json"
+MATCH_RADIUS = 6          # Hamming distance (of 64 bits) that counts as the same image
+MAX_IMAGE_BYTES = 8 << 20
+MAX_CONCURRENT = 8
+STAGE_DELTAS = [s for s in artifacts.STAGE_PATTERNS if s.endswith("_delta")]  # one per retailer
+
+
+class ImageCache:
+    """Bounded on-disk cache of downloaded images, evicting least recently used files.
+
+    Pinned files (downloaded but not hashed yet) are never evicted.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_MB << 20):
+        self.dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+        self.pinned = set()
+        try:
+            with open(self.index_path) as f:
+                self.entries = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.entries = {}
+        # drop entries whose file was removed behind our back
+        self.entries = {k: e for k, e in self.entries.items() if os.path.exists(self._path(k))}
+        self.total = sum(e["size"] for e in self.entries.values())
+
+    @staticmethod
+    def key(url):
+        return hashlib.sha1(url.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.dir, key[:2], key)
+
+    def get(self, url, pin=False):
+        """Cached file path for url (marking it recently used), or None."""
+        key = self.key(url)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            entry["used"] = time.time()
+            if pin:
+                self.pinned.add(key)
+        return self._path(key)
+
+    def unpin(self, url):
+        with self._lock:
+            self.pinned.discard(self.key(url))
+            self._evict()
+
+    def put(self, url, content, pin=False):
+        key = self.key(url)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path + ".tmp", "wb") as f:
+            f.write(content)
+        os.replace(path + ".tmp", path)
+        with self._lock:
+            old = self.entries.get(key)
+            self.total += len(content) - (old["size"] if old else 0)
+            self.entries[key] = {"url": url, "size": len(content), "used": time.time()}
+            if pin:
+                self.pinned.add(key)
+            self._evict(keep=key)
+        return path
+
+    def _evict(self, keep=None):
+        if self.total <= self.max_bytes:
+            return
+        for key, entry in sorted(self.entries.items(), key=lambda kv: kv[1]["used"]):
+            if self.total <= self.max_bytes:
+                break
+            if key == keep or key in self.pinned:
+                continue
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+            self.total -= entry["size"]
+            del self.entries[key]
+
+    def save(self):
+        os.makedirs(self.dir, exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.index_path)
+
+
+def download(url, cache):
+    """Fetch one image into the cache, pinned; returns its path or None."""
+    path = cache.get(url, pin=True)
+    if path:
+        return path
+    try:
+        resp = get(url, timeout=10)
+    except (RobotsDisallowed, requests.RequestException):
+        return None
+    if not resp.headers.get("Content-Type", "image/").startswith("image/") or len(resp.content) > MAX_IMAGE_BYTES:
+        return None
+    return cache.put(url, resp.content, pin=True)
+
+
+def fetch_and_hash(urls, cache, max_concurrent=MAX_CONCURRENT, workers=None):
+    """(downloaded, {url: hash}) for the urls that could be downloaded and decoded.
+
+    Each image is hashed as soon as its download completes and unpinned from
+    the cache once hashed. Per-host pacing is fetching's.
+    """
+    downloaded, hashes = 0, {}
+    with ThreadPoolExecutor(max_workers=max_concurrent) as threads, \
+            ProcessPoolExecutor(max_workers=workers) as procs:
+        downloads = {threads.submit(download, u, cache): u for u in urls}
+        hashing = {}
+        for fut in as_completed(downloads):
+            path = fut.result()
+            if path:
+                downloaded += 1
+                hashing[procs.submit(dhash, path)] = downloads[fut]
+        for fut in as_completed(hashing):
+            url = hashing[fut]
+            h = fut.result()
+            cache.unpin(url)
+            if h is not None:
+                hashes[url] = h
+    return downloaded, hashes
+
+
+def dhash(path, size=8):
+    """64-bit difference hash of an image file, or None if it can't be decoded."""
+    try:
+        with Image.open(path) as im:
+            px = np.asarray(im.convert("L").resize((size + 1, size), Image.LANCZOS), dtype=np.int16)
+    except Exception:
+        return None
+    bits = (px[:, 1:] > px[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+def hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+class BKTree:
+    """Burkhard-Keller tree over 64-bit hashes: range queries by Hamming distance.
+
+    Each node is [hash, values, {distance: child}]. A query within radius r only
+    descends into children whose edge distance d satisfies |d - dist(q, node)| <= r
+    (triangle inequality), so most of the tree is never visited for small r.
+    """
+
+    def __init__(self):
+        self.root = None
+        self.size = 0
+
+    def add(self, h, value):
+        self.size += 1
+        if self.root is None:
+            self.root = [h, [value], {}]
+            return
+        node = self.root
+        while True:
+            d = hamming(h, node[0])
+            if d == 0:
+                node[1].append(value)
+                return
+            child = node[2].get(d)
+            if child is None:
+                node[2][d] = [h, [value], {}]
+                return
+            node = child
+
+    def search(self, h, radius):
+        """[(distance, value)] for every stored hash within radius of h."""
+        out, stack = [], [self.root] if self.root else []
+        while stack:
+            node = stack.pop()
+            d = hamming(h, node[0])
+            if d <= radius:
+                out.extend((d, v) for v in node[1])
+            for edge, child in node[2].items():
+                if d - radius <= edge <= d + radius:
+                    stack.append(child)
+        return sorted(out, key=lambda dv: dv[0])
+
+
+class ImageIndex:
+    """Persistent url -> hash index with a BK-tree built on load."""
+
+    def __init__(self, path=INDEX_PATH, radius=MATCH_RADIUS):
+        self.path = path
+        self.radius = radius
+        try:
+            with open(path) as f:
+                images = json.load(f)
+        except (FileNotFoundError, ValueError):
+            images = {}
+        # entries without a hash (older runs) are dropped so they are retried
+        self.images = {url: rec for url, rec in images.items() if rec.get("hash")}
+        self.tree = BKTree()
+        for url, rec in self.images.items():
+            self.tree.add(int(rec["hash"], 16), url)
+
+    def add(self, url, h, source, kind, day):
+        """Index one image; returns its earlier near-duplicates as [(distance, url)]."""
+        self.images[url] = {"hash": f"{h:016x}", "source": source, "kind": kind, "first_seen": day}
+        matches = [(d, u) for d, u in self.tree.search(h, self.radius) if u != url]
+        self.tree.add(h, url)
+        return matches
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.images, f)
+        os.replace(tmp, self.path)
+
+
+def article_images(path):
+    df = pd.read_csv(path, usecols=lambda c: c in ("link", "image_url"))
+    if "image_url" not in df.columns:
+        return []
+    df = df[df["image_url"].fillna("").str.startswith("http")]
+    hosts = df["link"].fillna("").map(lambda u: urlparse(u).netloc.lower()) if "link" in df.columns else ""
+    return list(zip(df["image_url"], hosts, ["article"] * len(df)))
+
+
+def product_images(path, retailer):
+    df = pd.read_csv(path)
+    if "image_url" not in df.columns:
+        return []
+    df = df[df["change"].isin(["arrival", "returned"]) & df["image_url"].fillna("").str.startswith("http")]
+    return [(u, retailer, "product") for u in df["image_url"]]
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Perceptual-hash index of article and product images")
+    ap.add_argument("--articles", help="Clustered CSV (default: latest from the artifact manifest)")
+    ap.add_argument("--max-concurrent", type=int, default=MAX_CONCURRENT, help="Parallel downloads")
+    ap.add_argument("--workers", type=int, default=None, help="Hashing processes (default: CPU count)")
+    ap.add_argument("--cache-mb", type=int, default=CACHE_MAX_MB, help="Image cache size bound")
+    ap.add_argument("--radius", type=int, default=MATCH_RADIUS, help="Max Hamming distance for a match")
+    ap.add_argument("--limit", type=int, help="Only the first N new images")
+    args = ap.parse_args()
+
+    if Image is None:
+        print("❌ Pillow is required for the image stage: pip install Pillow")
+        return
+
+    candidates, used = [], []
+    articles = args.articles or artifacts.resolve("clustered")
+    if articles:
+        candidates += article_images(articles)
+        used.append(articles)
+    for stage in STAGE_DELTAS:
+        path = artifacts.resolve(stage)
+        if path:
+            candidates += product_images(path, stage[: -len("_delta")])
+            used.append(path)
+
+    index = ImageIndex(radius=args.radius)
+    new, seen = [], set()
+    for url, source, kind in candidates:
+        if url not in index.images and url not in seen:
+            seen.add(url)
+            new.append((url, source, kind))
+    if args.limit:
+        new = new[: args.limit]
+    if not new:
+        print("No new images since the last run.")
+        return
+
+    cache = ImageCache(max_bytes=args.cache_mb << 20)
+    t0 = time.perf_counter()
+    downloaded, hashes = fetch_and_hash([u for u, _, _ in new], cache, args.max_concurrent, args.workers)
+    cache.save()
+    print(f"⬇️  {downloaded}/{len(new)} images downloaded, {len(hashes)} hashed in "
+          f"{time.perf_counter() - t0:.1f}s (cache {cache.total / 2**20:.0f} MB)")
+    metrics.registry.inc("trend_images_hashed_total", {}, len(hashes))
+
+    day = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    rows = []
+    for url, source, kind in new:
+        if url not in hashes:
+            continue  # download or decode failed: not indexed, so a later run retries it
+        for dist, other in index.add(url, hashes[url], source, kind, day):
+            rec = index.images[other]
+            rows.append({"image_url": url, "source": source, "kind": kind,
+                         "matched_url": other, "matched_source": rec["source"], "matched_kind": rec["kind"],
+                         "distance": dist, "cross_source": rec["source"] != source})
+    index.save()
+    metrics.write("image_index")
+    print(f"🖼️  Indexed {len(hashes)} images ({index.tree.size} hashes in the index)")
+
+    if not rows:
+        print("No repeated images.")
+        return
+    df = pd.DataFrame(rows)
+    ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    out = f"data/image_matches_{ts}.csv"
+    os.makedirs("data", exist_ok=True)
+    df.to_csv(out, index=False)
+    artifacts.record("image_matches", out, df=df, inputs=used)
+    print(f"✅ {len(df)} near-duplicate pairs ({int(df['cross_source'].sum())} across sources), saved {out}")
+    top = df.groupby("image_url")["matched_source"].nunique().sort_values(ascending=False).head(10)
+    print("Most repeated:", top.to_dict())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,39 @@
 # scripts/ingest_rss.py
-import requests, feedparser, pandas as pd
+"""
+Collect RSS articles into data/rss_results_<timestamp>.csv.
+
+Incremental: a per-feed watermark (watermarks.py) skips entries at or before
+the last ingested publish time before any parsing, and feeds are fetched
+with conditional GETs. Each row carries the entry's published_at alongside
+ingested_at.
+
+--daemon keeps running instead: each feed is polled on its own learned
+interval (feed_scheduler.py), at most --max-concurrent fetches at a time,
+and new entries are written out in micro-batches (--batch-size /
+--batch-seconds). --downstream also runs tag/clean/cluster and the burst
+detector on a background thread, over every batch saved since its last
+run and at most once per --downstream-seconds, so the models are loaded
+once per interval and polling never waits on them.
+
+Per-feed fetch/parse latency, bytes, entry, duplicate and failure metrics
+are written to data/state/metrics/ingest_rss.prom (metrics.py).
+"""
+import feedparser, pandas as pd
 from bs4 import BeautifulSoup
 from datetime import datetime, timezone  # <-- updated
+import argparse
 import hashlib
 import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import artifacts
+import metrics
+from feed_scheduler import FeedSchedule
+from fetching import RobotsDisallowed, get
+from watermarks import WatermarkStore, entry_published
 
 rss_feeds = [
     "https://www.businessoffashion.com/arc/outboundfeeds/rss/?outputType=xml",
@@ -27,73 +57,262 @@ rss_feeds = [
     "https://feeds.content.dowjones.io/public/rss/RSSMarketsMain"
 ]
 
-keywords_df = pd.read_csv("data/seed_keywords.csv")  # columns: category,keyword
-keywords = list(keywords_df['keyword'])
 
-all_entries = []
-seen_hashes = set()
+# downstream stages run over the daemon's micro-batches saved since the last run (--downstream)
+DOWNSTREAM = [
+    lambda csv_paths: ["scripts/tag_keywords.py", "--input", *csv_paths],
+    lambda csv_paths: ["scripts/clean_embed.py", "--input", *csv_paths],
+    lambda csv_paths: ["scripts/cluster_topics.py"],
+    lambda csv_paths: ["scripts/burst_detector.py", "--keywords-from", *csv_paths],
+]
+
 
-headers = {'User-Agent': 'Mozilla/5.0'}
+def load_keywords():
+    keywords_df = pd.read_csv("data/seed_keywords.csv")  # columns: category,keyword
+    return list(keywords_df['keyword'])
 
-for feed_url in rss_feeds:
+
+def download_feed(feed_url, headers=None):
+    """(status, response): status is "ok", "unchanged" (HTTP 304), "disallowed" or "failed"."""
+    labels = {"feed": feed_url}
     try:
-        resp = requests.get(feed_url, headers=headers, timeout=10)
-        resp.raise_for_status()
-        feed = feedparser.parse(resp.content)
+        # robots.txt-checked, paced per host
+        with metrics.registry.timer("trend_feed_fetch_seconds", labels):
+            resp = get(feed_url, timeout=10, headers=headers)
+    except RobotsDisallowed as e:
+        print("Skipped:", e)
+        metrics.registry.inc("trend_feed_failures_total", {**labels, "reason": "disallowed"})
+        return "disallowed", None
     except Exception as e:
         print("Failed to fetch:", feed_url, e)
-        continue
+        metrics.registry.inc("trend_feed_failures_total", {**labels, "reason": "error"})
+        return "failed", None
+    if resp.status_code == 304:
+        metrics.registry.inc("trend_feed_not_modified_total", labels)
+        return "unchanged", None
+    metrics.registry.inc("trend_feed_bytes_total", labels, len(resp.content))
+    return "ok", resp
 
-    for entry in feed.entries:
-        title = entry.get("title", "")
-        summary_raw = entry.get("summary") or entry.get("description") or ""
-        summary = BeautifulSoup(summary_raw, "html.parser").get_text(separator=" ").strip()
-        link = entry.get("link", "")
-        ingested_at = datetime.now(timezone.utc).isoformat()  # <-- timezone-aware UTC
-
-        # dedupe key
-        if link:
-            key = link
-        else:
-            key = hashlib.sha1((title + summary).encode("utf-8")).hexdigest()
 
+def process_feed(feed_url, resp, keywords, watermarks, seen_hashes):
+    """Parse a downloaded feed: (all entries, rows for the new ones)."""
+    labels = {"feed": feed_url}
+    with metrics.registry.timer("trend_feed_parse_seconds", labels):
+        watermarks.set_http_validators(feed_url, resp)
+        feed = feedparser.parse(resp.content)
+        rows = feed_rows(feed_url, feed, keywords, watermarks, seen_hashes)
+    metrics.registry.set("trend_feed_entries_last_poll", labels, len(feed.entries))
+    metrics.registry.set("trend_feed_last_success_timestamp_seconds", labels, time.time())
+    return feed.entries, rows
+
+
+def entry_row(entry, keywords):
+    """Full parse of one (new) entry into an output row."""
+    title = entry.get("title", "")
+    summary_raw = entry.get("summary") or entry.get("description") or ""
+    summary = BeautifulSoup(summary_raw, "html.parser").get_text(separator=" ").strip()
+    link = entry.get("link", "")
+    ingested_at = datetime.now(timezone.utc).isoformat()  # <-- timezone-aware UTC
+    published = entry_published(entry)
+
+    # basic keyword matching
+    matched = []
+    text_lower = f"{title} {summary}".lower()
+    for kw in keywords:
+        if kw.lower() in text_lower:
+            matched.append(kw)
+
+    # try to get image url if present
+    image_url = ""
+    if entry.get("media_content"):
+        mc = entry.get("media_content")
+        if isinstance(mc, list) and mc:
+            image_url = mc[0].get("url", "")
+    if not image_url:
+        soup = BeautifulSoup(entry.get("summary", ""), "html.parser")
+        img = soup.find("img")
+        if img and img.get("src"):
+            image_url = img.get("src")
+
+    return {
+        "title": title,
+        "summary": summary,
+        "link": link,
+        "matched_keywords": ", ".join(matched),
+        "published_at": published.isoformat() if published else "",
+        "ingested_at": ingested_at,
+        "image_url": image_url
+    }
+
+
+def dedupe_key(entry):
+    link = entry.get("link", "")
+    if link:
+        return link
+    return hashlib.sha1((entry.get("title", "") + (entry.get("summary") or "")).encode("utf-8")).hexdigest()
+
+
+def feed_rows(feed_url, feed, keywords, watermarks, seen_hashes):
+    """Rows for one fetched feed's entries newer than its watermark; advances the watermark."""
+    # cheap checks first: watermark + dedupe before any BeautifulSoup work
+    new_entries = []
+    skipped = {"watermark": 0, "dedupe": 0}
+    for entry in feed.entries:
+        if not watermarks.is_new(feed_url, entry):
+            skipped["watermark"] += 1
+            continue
+        key = dedupe_key(entry)
         if key in seen_hashes:
+            skipped["dedupe"] += 1
             continue
         seen_hashes.add(key)
+        new_entries.append(entry)
+
+    rows = [entry_row(entry, keywords) for entry in new_entries]
+    watermarks.advance(feed_url, new_entries)
+
+    labels = {"feed": feed_url}
+    metrics.registry.inc("trend_feed_entries_total", labels, len(feed.entries))
+    metrics.registry.inc("trend_feed_new_entries_total", labels, len(new_entries))
+    for reason, n in skipped.items():
+        metrics.registry.inc("trend_feed_duplicates_total", {**labels, "reason": reason}, n)
+    return rows
+
+
+def ingest_feeds(feeds, keywords, watermarks, seen_hashes=None):
+    """Rows for entries newer than each feed's watermark; advances the watermarks in memory."""
+    seen_hashes = set() if seen_hashes is None else seen_hashes
+    rows = []
+    for feed_url in feeds:
+        # conditional on the last ETag/Last-Modified
+        status, resp = download_feed(feed_url, watermarks.http_validators(feed_url))
+        if status == "ok":
+            rows.extend(process_feed(feed_url, resp, keywords, watermarks, seen_hashes)[1])
+    return rows
+
+
+def save_rows(rows):
+    """Save a timestamped CSV and record it in the manifest; returns the path."""
+    df = pd.DataFrame(rows, columns=["title", "summary", "link", "matched_keywords",
+                                     "published_at", "ingested_at", "image_url"])
+    os.makedirs("data", exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")  # <-- timezone-aware
+    csv_path = f"data/rss_results_{timestamp}.csv"
+    df.to_csv(csv_path, index=False)
+    artifacts.record("ingest", csv_path, df=df)
+    return csv_path
+
+
+def run_downstream(csv_paths):
+    for build in DOWNSTREAM:
+        cmd = [sys.executable] + build(csv_paths)
+        if subprocess.run(cmd).returncode != 0:
+            print(f"❌ Downstream stage failed: {' '.join(cmd[1:])}")
+            return
+
+
+def daemon(feeds, keywords, max_concurrent=4, batch_size=50, batch_seconds=900,
+           downstream=False, downstream_seconds=3600, max_sleep=60):
+    """Poll feeds on their learned schedules forever, flushing new rows in micro-batches."""
+    watermarks = WatermarkStore()
+    schedule = FeedSchedule()
+    pending, seen_hashes = [], set()
+    batch_started = None
+    in_flight = {}
+    queued, downstream_job, downstream_at = [], None, 0.0  # batches awaiting downstream
+
+    def flush():
+        nonlocal pending, seen_hashes, batch_started
+        if pending:
+            csv_path = save_rows(pending)
+            print(f"📦 Saved {csv_path} ({len(pending)} new entries)")
+            if downstream:
+                queued.append(csv_path)
+        # watermarks only move on disk once the rows they cover are saved
+        watermarks.save()
+        schedule.save()
+        metrics.write("ingest_rss")
+        pending, seen_hashes, batch_started = [], set(), None
+
+    def start_downstream():
+        """Hand the queued batches to the downstream thread if it's idle and the interval has passed."""
+        nonlocal queued, downstream_job, downstream_at
+        if queued and (downstream_job is None or downstream_job.done()) \
+                and time.time() - downstream_at >= downstream_seconds:
+            downstream_job = runner.submit(run_downstream, queued)
+            queued, downstream_at = [], time.time()
+
+    print(f"🛰️  Polling {len(feeds)} feeds (max {max_concurrent} concurrent fetches)")
+    with ThreadPoolExecutor(max_workers=max_concurrent) as pool, ThreadPoolExecutor(max_workers=1) as runner:
+        try:
+            while True:
+                for feed_url in schedule.due([f for f in feeds if f not in in_flight.values()]):
+                    # only the download runs in the pool; watermark state is touched on this thread
+                    headers = watermarks.http_validators(feed_url)
+                    in_flight[pool.submit(download_feed, feed_url, headers)] = feed_url
+
+                if in_flight:
+                    done, _ = wait(in_flight, timeout=max_sleep, return_when=FIRST_COMPLETED)
+                else:
+                    time.sleep(min(max_sleep, schedule.next_due_in(feeds)))
+                    done = ()
+
+                for fut in done:
+                    feed_url = in_flight.pop(fut)
+                    status, resp = fut.result()
+                    if status == "ok":
+                        entries, rows = process_feed(feed_url, resp, keywords, watermarks, seen_hashes)
+                        schedule.record_poll(feed_url, entries, len(rows))
+                        if rows and batch_started is None:
+                            batch_started = time.time()
+                        pending.extend(rows)
+                    elif status == "unchanged":
+                        schedule.record_unchanged(feed_url)
+                    else:
+                        schedule.record_failure(feed_url)
+
+                if len(pending) >= batch_size or (
+                    batch_started is not None and time.time() - batch_started >= batch_seconds
+                ):
+                    flush()
+                start_downstream()
+        except KeyboardInterrupt:
+            print("\n🛑 Stopping; flushing pending entries")
+            for fut in in_flight:
+                fut.cancel()
+            flush()
+            if queued:
+                print(f"⏳ Running downstream on {len(queued)} remaining batch(es)")
+                runner.submit(run_downstream, queued)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Ingest new RSS entries")
+    ap.add_argument("--daemon", action="store_true", help="Keep polling feeds on adaptive per-feed schedules")
+    ap.add_argument("--max-concurrent", type=int, default=4, help="Max feed fetches in flight (daemon)")
+    ap.add_argument("--batch-size", type=int, default=50, help="Flush a micro-batch at this many new rows (daemon)")
+    ap.add_argument("--batch-seconds", type=int, default=900,
+                    help="...or when the oldest pending row is this old (daemon)")
+    ap.add_argument("--downstream", action="store_true",
+                    help="Run tag/clean/cluster/bursts on saved micro-batches in the background (daemon)")
+    ap.add_argument("--downstream-seconds", type=int, default=3600,
+                    help="Minimum time between downstream runs; batches queue up meanwhile (daemon)")
+    args = ap.parse_args()
+
+    if args.daemon:
+        daemon(rss_feeds, load_keywords(), max_concurrent=args.max_concurrent, batch_size=args.batch_size,
+               batch_seconds=args.batch_seconds, downstream=args.downstream,
+               downstream_seconds=args.downstream_seconds)
+        return
+
+    watermarks = WatermarkStore()
+    rows = ingest_feeds(rss_feeds, load_keywords(), watermarks)
+    csv_path = save_rows(rows)
+    # only commit the watermarks once the rows are safely on disk
+    watermarks.save()
+    metrics.write("ingest_rss")
+    print(f"Saved {csv_path} ({len(rows)} new entries)")
 
-        # basic keyword matching
-        matched = []
-        text_lower = f"{title} {summary}".lower()
-        for kw in keywords:
-            if kw.lower() in text_lower:
-                matched.append(kw)
-
-        # try to get image url if present
-        image_url = ""
-        if entry.get("media_content"):
-            mc = entry.get("media_content")
-            if isinstance(mc, list) and mc:
-                image_url = mc[0].get("url", "")
-        if not image_url:
-            soup = BeautifulSoup(entry.get("summary", ""), "html.parser")
-            img = soup.find("img")
-            if img and img.get("src"):
-                image_url = img.get("src")
-
-        all_entries.append({
-            "title": title,
-            "summary": summary,
-            "link": link,
-            "matched_keywords": ", ".join(matched),
-            "ingested_at": ingested_at,
-            "image_url": image_url
-        })
-
-# save timestamped CSV
-df = pd.DataFrame(all_entries)
-os.makedirs("data", exist_ok=True)
-timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")  # <-- timezone-aware
-csv_path = f"data/rss_results_{timestamp}.csv"
-df.to_csv(csv_path, index=False)
-print("Saved", csv_path)
 
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# scripts/metrics.py
+"""
+Process-wide fetch metrics in Prometheus text format, plus a rolling history.
+
+Counters, gauges and histograms live in one in-memory registry (`registry`),
+fed by fetching.get (per host: request latency, bytes, status), by
+ingest_rss.py (per feed: fetch/parse latency, bytes, entries, duplicates,
+failures) and by scrape_engine.py (per retailer: parse time, items). At the
+end of a run (or each daemon micro-batch) the owning script calls
+write(job), which:
+ - rewrites data/state/metrics/<job>.prom atomically, ready for the
+   node_exporter textfile collector (point it at that directory, or set
+   TREND_METRICS_DIR); every series there carries a job label, so two jobs
+   fetching from the same host don't write duplicate series
+ - appends a flattened snapshot to data/state/metrics_history.jsonl, keeping
+   the last HISTORY_MAX lines
+
+    python scripts/metrics.py --job ingest_rss     # slowest / biggest / empty feeds and hosts
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+METRICS_DIR = os.environ.get("TREND_METRICS_DIR", "data/state/metrics")
+HISTORY_PATH = "data/state/metrics_history.jsonl"
+HISTORY_MAX = 2000
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+HELP = {
+    "trend_http_request_seconds": ("histogram", "HTTP request latency per host"),
+    "trend_http_requests_total": ("counter", "HTTP requests per host and status code (or error)"),
+    "trend_http_response_bytes_total": ("counter", "Response body bytes per host"),
+    "trend_feed_fetch_seconds": ("histogram", "Feed download latency, including the per-host politeness wait"),
+    "trend_feed_parse_seconds": ("histogram", "Feed parse + entry processing time"),
+    "trend_feed_bytes_total": ("counter", "Feed document bytes downloaded"),
+    "trend_feed_entries_total": ("counter", "Entries in fetched feed documents"),
+    "trend_feed_new_entries_total": ("counter", "Entries newer than the feed watermark and not duplicates"),
+    "trend_feed_duplicates_total": ("counter", "Entries discarded, by reason (watermark, dedupe)"),
+    "trend_feed_failures_total": ("counter", "Failed feed polls, by reason"),
+    "trend_feed_not_modified_total": ("counter", "Feed polls answered with HTTP 304"),
+    "trend_feed_entries_last_poll": ("gauge", "Entries in the feed document at the last successful poll"),
+    "trend_feed_last_success_timestamp_seconds": ("gauge", "Unix time of the feed's last successful poll"),
+    "trend_scrape_items_total": ("counter", "Product cards seen per retailer"),
+    "trend_scrape_arrivals_total": ("counter", "New products per retailer"),
+    "trend_scrape_parse_seconds": ("histogram", "HTML parse time per listing/product page"),
+    "trend_scrape_failures_total": ("counter", "Product pages that failed to parse"),
+    "trend_images_hashed_total": ("counter", "Images downloaded and perceptually hashed"),
+    "trend_run_duration_seconds": ("gauge", "Wall time of the job's last run"),
+    "trend_run_last_timestamp_seconds": ("gauge", "Unix time the job last wrote metrics"),
+}
+
+
+def _labels_key(labels):
+    return tuple(sorted((labels or {}).items()))
+
+
+def _fmt_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{" + ",".join(f'{k}="{esc(v)}"' for k, v in pairs) + "}"
+
+
+class Registry:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self.counters = defaultdict(float)
+        self.gauges = {}
+        self.histograms = {}  # (name, labels) -> [bucket counts..., sum, count]
+
+    def inc(self, name, labels=None, value=1):
+        with self._lock:
+            self.counters[(name, _labels_key(labels))] += value
+
+    def set(self, name, labels=None, value=0):
+        with self._lock:
+            self.gauges[(name, _labels_key(labels))] = value
+
+    def observe(self, name, labels=None, value=0.0):
+        with self._lock:
+            h = self.histograms.setdefault((name, _labels_key(labels)), [0] * (len(self.buckets) + 2))
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    h[i] += 1
+            h[-2] += value
+            h[-1] += 1
+
+    @contextmanager
+    def timer(self, name, labels=None):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, labels, time.perf_counter() - t0)
+
+    def render(self, job=None):
+        """All metrics in Prometheus text exposition format.
+
+        With job, every series without a job label gets one: the per-host
+        series of different jobs' .prom files would otherwise collide in the
+        textfile collector.
+        """
+        def with_job(key):
+            return key if job is None or any(k == "job" for k, _ in key) else tuple(sorted(key + (("job", job),)))
+
+        with self._lock:
+            series = defaultdict(list)  # name -> [(labels, [lines])], buckets kept in le order
+            for (name, key), v in self.counters.items():
+                key = with_job(key)
+                series[name].append((key, [f"{name}{_fmt_labels(key)} {v:g}"]))
+            for (name, key), v in self.gauges.items():
+                key = with_job(key)
+                series[name].append((key, [f"{name}{_fmt_labels(key)} {v:g}"]))
+            for (name, key), h in self.histograms.items():
+                key = with_job(key)
+                block = [f"{name}_bucket{_fmt_labels(key, [('le', f'{b:g}')])} {c}" for b, c in zip(self.buckets, h)]
+                block += [
+                    f"{name}_bucket{_fmt_labels(key, [('le', '+Inf')])} {h[-1]}",
+                    f"{name}_sum{_fmt_labels(key)} {h[-2]:g}",
+                    f"{name}_count{_fmt_labels(key)} {h[-1]}",
+                ]
+                series[name].append((key, block))
+        lines = []
+        for name in sorted(series):
+            kind, text = HELP.get(name, ("untyped", name))
+            lines += [f"# HELP {name} {text}", f"# TYPE {name} {kind}"]
+            for _, block in sorted(series[name]):
+                lines += block
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Flat {series: value} dict; histograms contribute _sum and _count."""
+        with self._lock:
+            out = {f"{n}{_fmt_labels(k)}": v for (n, k), v in self.counters.items()}
+            out.update({f"{n}{_fmt_labels(k)}": v for (n, k), v in self.gauges.items()})
+            for (n, k), h in self.histograms.items():
+                out[f"{n}_sum{_fmt_labels(k)}"] = round(h[-2], 6)
+                out[f"{n}_count{_fmt_labels(k)}"] = h[-1]
+        return out
+
+
+registry = Registry()
+
+
+def write(job, metrics_dir=None, history_path=HISTORY_PATH):
+    """Write <job>.prom and append a snapshot to the rolling history."""
+    now = time.time()
+    registry.set("trend_run_duration_seconds", {"job": job}, now - registry.started)
+    registry.set("trend_run_last_timestamp_seconds", {"job": job}, now)
+
+    metrics_dir = metrics_dir or METRICS_DIR
+    os.makedirs(metrics_dir, exist_ok=True)
+    path = os.path.join(metrics_dir, f"{job}.prom")
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        f.write(registry.render(job))
+    os.replace(tmp, path)
+
+    os.makedirs(os.path.dirname(history_path), exist_ok=True)
+    try:
+        with open(history_path) as f:
+            lines = f.readlines()[-(HISTORY_MAX - 1):]
+    except FileNotFoundError:
+        lines = []
+    record = {"ts": now, "job": job, "started": registry.started, "metrics": registry.snapshot()}
+    lines.append(json.dumps(record) + "\n")
+    tmp = history_path + ".tmp"
+    with open(tmp, "w") as f:
+        f.writelines(lines)
+    os.replace(tmp, history_path)
+    return path
+
+
+def load_history(history_path=HISTORY_PATH, job=None):
+    try:
+        with open(history_path) as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+    return [r for r in records if job is None or r["job"] == job]
+
+
+def _split(series):
+    """'name{a="x"}' -> (name, 'a="x"')."""
+    name, _, labels = series.partition("{")
+    return name, labels.rstrip("}")
+
+
+def summarize(records):
+    """Per-label mean latency/bytes and zero-entry feeds over the given history records."""
+    # counters are cumulative per process (a daemon writes many records): keep each process's last
+    final = {(r["job"], r.get("started")): r for r in records}
+    sums = defaultdict(lambda: defaultdict(float))
+    for r in final.values():
+        for series, v in r["metrics"].items():
+            name, labels = _split(series)
+            sums[labels][name] += v
+    rows = []
+    for labels, m in sums.items():
+        for prefix, count_key, bytes_key in (
+            ("trend_feed_fetch_seconds", "trend_feed_fetch_seconds_count", "trend_feed_bytes_total"),
+            ("trend_http_request_seconds", "trend_http_request_seconds_count", "trend_http_response_bytes_total"),
+        ):
+            if m.get(count_key):
+                rows.append({
+                    "series": labels,
+                    "kind": "feed" if prefix.startswith("trend_feed") else "host",
+                    "requests": int(m[count_key]),
+                    "mean_seconds": round(m[prefix + "_sum"] / m[count_key], 3),
+                    "mean_kb": round(m.get(bytes_key, 0) / m[count_key] / 1024, 1),
+                })
+    polled = [r for r in records if any(_split(s)[0] == "trend_feed_entries_last_poll" for s in r["metrics"])]
+    latest = polled[-1]["metrics"] if polled else {}
+    empty = sorted(_split(s)[1] for s, v in latest.items()
+                   if _split(s)[0] == "trend_feed_entries_last_poll" and v == 0)
+    return sorted(rows, key=lambda r: -r["mean_seconds"]), empty
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Summarise the rolling fetch-metrics history")
+    ap.add_argument("--job", help="Only this job (e.g. ingest_rss, moda, farfetch)")
+    ap.add_argument("--last", type=int, default=50, help="History records to include")
+    args = ap.parse_args()
+
+    records = load_history(job=args.job)[-args.last:]
+    if not records:
+        print("No metrics history yet (data/state/metrics_history.jsonl).")
+        return
+    rows, empty = summarize(records)
+    print(f"📈 {len(records)} runs, {time.strftime('%Y-%m-%d %H:%M', time.localtime(records[0]['ts']))} .. "
+          f"{time.strftime('%Y-%m-%d %H:%M', time.localtime(records[-1]['ts']))}")
+    print(f"\n{'kind':<5} {'requests':>8} {'mean s':>8} {'mean KB':>9}  series")
+    for r in rows:
+        print(f"{r['kind']:<5} {r['requests']:>8} {r['mean_seconds']:>8} {r['mean_kb']:>9}  {r['series']}")
+    if empty:
+        print("\n⚠️ Feeds with zero entries at their last poll:")
+        for labels in empty:
+            print("  ", labels)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+# scripts/product_catalogue.py
+"""
+Persistent product catalogue for the retailer scrapers.
+
+SQLite file (data/state/product_catalogue.sqlite) keyed by product URL with
+first_seen / last_seen, designer and title. Each scraper run upserts what it
+saw and gets back only the delta vs. the previous crawl:
+ - arrivals  : URLs never seen before
+ - returned  : URLs that had been marked removed and are listed again
+ - removals  : URLs active last time but missing from a *complete* crawl
+
+Word / bigram / designer counts are accumulated per day over arrivals only
+(table arrival_terms), so trends are incremental instead of recounting the
+whole new-in listing each run.
+"""
+
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+CATALOGUE_PATH = "data/state/product_catalogue.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    url        TEXT PRIMARY KEY,
+    retailer   TEXT NOT NULL,
+    designer   TEXT,
+    title      TEXT,
+    first_seen TEXT NOT NULL,
+    last_seen  TEXT NOT NULL,
+    removed_at TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_products_retailer ON products (retailer, removed_at);
+CREATE TABLE IF NOT EXISTS arrival_terms (
+    day       TEXT NOT NULL,
+    retailer  TEXT NOT NULL,
+    term_type TEXT NOT NULL,
+    term      TEXT NOT NULL,
+    count     INTEGER NOT NULL,
+    PRIMARY KEY (day, retailer, term_type, term)
+);
+"""
+
+
+class ProductCatalogue:
+    def __init__(self, path=CATALOGUE_PATH):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def active_urls(self, retailer):
+        """URLs currently listed for a retailer (the scraper can skip re-parsing these)."""
+        cur = self.conn.execute(
+            "SELECT url FROM products WHERE retailer = ? AND removed_at IS NULL", (retailer,)
+        )
+        return {row[0] for row in cur}
+
+    def apply_crawl(self, retailer, items, complete=True, now=None):
+        """Upsert one crawl's items and return (arrivals, returned, removals).
+
+        items: dicts with 'url' and, for products not already active, 'title' and
+        'designer'. Removals are only computed when the crawl covered the whole
+        listing (complete=True) - a --max-products run can't tell us what's gone.
+        """
+        now = now or datetime.now(timezone.utc).isoformat()
+        status = dict(self.conn.execute(
+            "SELECT url, removed_at FROM products WHERE retailer = ?", (retailer,)
+        ).fetchall())
+
+        arrivals, returned, seen = [], [], set()
+        with self.conn:
+            for it in items:
+                url = it["url"]
+                if url in seen:
+                    continue
+                seen.add(url)
+                if url not in status:
+                    self.conn.execute(
+                        "INSERT INTO products (url, retailer, designer, title, first_seen, last_seen) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        (url, retailer, it.get("designer") or "", it.get("title") or "", now, now),
+                    )
+                    arrivals.append(it)
+                elif status[url] is not None:
+                    self.conn.execute(
+                        "UPDATE products SET last_seen = ?, removed_at = NULL, "
+                        "designer = COALESCE(NULLIF(?, ''), designer), title = COALESCE(NULLIF(?, ''), title) "
+                        "WHERE url = ?",
+                        (now, it.get("designer") or "", it.get("title") or "", url),
+                    )
+                    returned.append(it)
+                else:
+                    self.conn.execute("UPDATE products SET last_seen = ? WHERE url = ?", (now, url))
+
+            removals = []
+            if complete:
+                gone = [u for u, removed in status.items() if removed is None and u not in seen]
+                if gone:
+                    removals = self._products(gone)
+                    self.conn.executemany(
+                        "UPDATE products SET removed_at = ? WHERE url = ?", [(now, u) for u in gone]
+                    )
+        return arrivals, returned, removals
+
+    def _products(self, urls):
+        out = []
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            q = "SELECT url, designer, title FROM products WHERE url IN (%s)" % ",".join("?" * len(chunk))
+            out.extend({"url": u, "designer": d, "title": t} for u, d, t in self.conn.execute(q, chunk))
+        return out
+
+    def add_arrival_terms(self, retailer, counter, day=None):
+        """Add a TrendCounter built over arrivals to the per-day term table."""
+        day = day or datetime.now(timezone.utc).strftime("%Y-%m-%d")
+        rows = [(day, retailer, "word", w, c) for w, c in counter.words.items()]
+        rows += [(day, retailer, "bigram", " ".join(bg), c) for bg, c in counter.bigrams.items()]
+        rows += [(day, retailer, "designer", d, c) for d, c in counter.designers.items()]
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO arrival_terms (day, retailer, term_type, term, count) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (day, retailer, term_type, term) DO UPDATE SET count = count + excluded.count",
+                rows,
+            )
+
+    def top_terms(self, retailer, term_type, since_day, n=20):
+        """Most frequent arrival terms for a retailer since since_day (YYYY-MM-DD)."""
+        return self.conn.execute(
+            "SELECT term, SUM(count) AS c FROM arrival_terms "
+            "WHERE retailer = ? AND term_type = ? AND day >= ? "
+            "GROUP BY term ORDER BY c DESC, term LIMIT ?",
+            (retailer, term_type, since_day, n),
+        ).fetchall()
+
+    def term_series(self):
+        """Every arrival_terms row as (day, retailer, term_type, term, count) tuples."""
+        return self.conn.execute(
+            "SELECT day, retailer, term_type, term, count FROM arrival_terms ORDER BY day"
+        ).fetchall()
+
+    def arrivals_per_day(self, retailer, since_day):
+        """[(day, n_new_products)] - product velocity for a retailer."""
+        return self.conn.execute(
+            "SELECT substr(first_seen, 1, 10) AS day, COUNT(*) FROM products "
+            "WHERE retailer = ? AND first_seen >= ? GROUP BY day ORDER BY day",
+            (retailer, since_day),
+        ).fetchall()
@@ -0,0 +1,126 @@
+# scripts/product_terms.py
+"""
+Retailer product terms as one long, typed time series, scored like topics.
+
+Sources, concatenated into (date, retailer, term_type, term, count):
+ - legacy scraper snapshots data/[DD-MM-YYYY/]<retailer>_new_<ts>.csv, whose
+   top_words / top_bigrams / top_designers rows hold the count in the
+   string-typed `value` column (item rows are dropped)
+ - the product catalogue's arrival_terms table (per-day counts over new
+   arrivals, written by the current scrapers)
+
+Designers, words and bigrams are then scored per week over all history in
+one pass with the same vectorized velocity/recency scoring as
+calc_trend_scores.py (trend_scoring.py). The number of retailers carrying a
+term plays the role of source_count.
+
+Outputs:
+ - data/product_terms_<timestamp>.csv         (the unified series)
+ - data/product_trend_scores_<timestamp>.csv  (every term x week)
+"""
+
+import argparse
+import glob
+import os
+import re
+from datetime import datetime, timezone
+
+import pandas as pd
+
+import artifacts
+from product_catalogue import ProductCatalogue
+from trend_scoring import score_weeks, weekly_matrices, year_week
+
+LEGACY_RE = re.compile(r"^(?P<retailer>[a-z]+)_new_(?P<ts>\d{8}_\d{6})\.csv$")
+LEGACY_SECTIONS = {"top_words": "word", "top_bigrams": "bigram", "top_designers": "designer"}
+SERIES_COLUMNS = ["date", "retailer", "term_type", "term", "count"]
+
+
+def legacy_files(base="data"):
+    found = glob.glob(os.path.join(base, "*_new_*.csv")) + glob.glob(os.path.join(base, "*", "*_new_*.csv"))
+    return sorted(f for f in found if LEGACY_RE.match(os.path.basename(f)))
+
+
+def load_legacy(files):
+    frames = []
+    for f in files:
+        m = LEGACY_RE.match(os.path.basename(f))
+        df = pd.read_csv(f, dtype=str)
+        df = df[df["section"].isin(LEGACY_SECTIONS)]
+        frames.append(pd.DataFrame({
+            "date": pd.Timestamp(datetime.strptime(m["ts"], "%Y%m%d_%H%M%S").date()),
+            "retailer": m["retailer"],
+            "term_type": df["section"].map(LEGACY_SECTIONS),
+            "term": df["metric"],
+            "count": pd.to_numeric(df["value"], errors="coerce"),
+        }))
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=SERIES_COLUMNS)
+
+
+def load_catalogue():
+    catalogue = ProductCatalogue()
+    try:
+        df = pd.DataFrame(catalogue.term_series(), columns=SERIES_COLUMNS)
+    finally:
+        catalogue.close()
+    df["date"] = pd.to_datetime(df["date"])
+    return df
+
+
+def term_series(base="data"):
+    """The unified long series with typed columns."""
+    df = pd.concat([load_legacy(legacy_files(base)), load_catalogue()], ignore_index=True)
+    df = df.dropna(subset=["term", "count"])
+    df = df[df["term"].str.strip() != ""]
+    return df.astype({
+        "date": "datetime64[ns]", "retailer": "category", "term_type": "category",
+        "term": "string", "count": "int32",
+    }).sort_values(["date", "retailer", "term_type", "term"], ignore_index=True)
+
+
+def score_terms(series, per_retailer=False):
+    """Trend metrics for every (term_type, term[, retailer]) and week in the series."""
+    df = series.assign(year_week=year_week(series["date"]),
+                       term_type=series["term_type"].astype(str),
+                       retailer=series["retailer"].astype(str))
+    key = ["retailer", "term_type", "term"] if per_retailer else ["term_type", "term"]
+    mentions, sources = weekly_matrices(df, key, count_col="count", source_col="retailer")
+    return score_weeks(mentions, sources)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Unified product-term series and trend scores")
+    ap.add_argument("--per-retailer", action="store_true", help="Score each retailer's terms separately")
+    ap.add_argument("--top", type=int, default=10, help="Terms per type to print for the latest week")
+    args = ap.parse_args()
+
+    series = term_series()
+    if series.empty:
+        print("ERROR: No scraper outputs or catalogue terms found. Run the scrapers first.")
+        return
+    print(f"Loaded {len(series)} term counts: {series['date'].min().date()} .. {series['date'].max().date()}, "
+          f"retailers: {', '.join(series['retailer'].cat.categories)}")
+
+    scores = score_terms(series, per_retailer=args.per_retailer)
+
+    ts = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    os.makedirs("data", exist_ok=True)
+    series_path = f"data/product_terms_{ts}.csv"
+    scores_path = f"data/product_trend_scores_{ts}.csv"
+    series.to_csv(series_path, index=False)
+    scores.to_csv(scores_path, index=False)
+    artifacts.record("product_terms", series_path, df=series, inputs=legacy_files())
+    artifacts.record("product_trend_scores", scores_path, df=scores, inputs=[series_path])
+    print(f"✅ Saved {series_path} and {scores_path}")
+
+    latest = scores[scores["year_week"] == scores["year_week"].max()]
+    for term_type, group in latest.groupby("term_type"):
+        top = group.sort_values("trend_score", ascending=False).head(args.top)
+        print(f"\nTop {term_type}s in {group['year_week'].iloc[0]}:")
+        cols = [c for c in ("retailer", "term", "trend_score", "mentions_this_week", "velocity", "source_count")
+                if c in top.columns]
+        print(top[cols].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
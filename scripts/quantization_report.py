@@ -0,0 +1,122 @@
+# scripts/quantization_report.py
+"""
+How much do float16 / int8 embeddings cost us versus float32?
+
+For each stored precision (see emb_store.py) reports:
+ - size in memory and bytes per vector
+ - recall@k of brute-force cosine kNN against the float32 neighbours
+ - topic agreement: share of rows assigned to the same nearest topic
+   centroid as with float32 (centroids from the clustered CSV's topics when
+   the manifest links one to these embeddings, otherwise random anchor rows)
+ - max absolute reconstruction error
+
+    python scripts/quantization_report.py                      # latest embeddings
+    python scripts/quantization_report.py --embeddings models/embeddings_<ts>.npy
+    python scripts/quantization_report.py --synthetic 100000   # no data needed
+
+Saved to data/quantization_report_<timestamp>.csv.
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+from emb_store import CompactEmbeddings, load_embeddings, quantize_int8
+from scalable_cluster import assign_to_centroids, sample_indices, topic_centroids
+
+
+def load_reference(args):
+    """(float32 matrix, topic labels or None, description)."""
+    if args.synthetic:
+        from bench_clustering import synthetic_embeddings
+        emb, truth = synthetic_embeddings(args.synthetic, n_clusters=50)
+        return emb.astype(np.float32), truth, f"synthetic n={args.synthetic}"
+
+    path = args.embeddings or artifacts.resolve("embeddings")
+    if path is None:
+        print("ERROR: No embeddings found. Run clean_embed.py first or pass --synthetic N.")
+        sys.exit(1)
+    emb = load_embeddings(path).to_float32()
+
+    labels = None
+    meta = artifacts.info(path)
+    clean = meta["inputs"][0] if meta and meta["inputs"] else None
+    clustered = artifacts.derived(clean, "clustered") if clean else None
+    if clustered:
+        topics = pd.read_csv(clustered, usecols=["topic"])["topic"].to_numpy()
+        if len(topics) == len(emb):
+            labels = topics
+    return emb, labels, path
+
+
+def compact_variants(emb):
+    return {
+        "float32": CompactEmbeddings(emb),
+        "float16": CompactEmbeddings(emb.astype(np.float16)),
+        "int8": CompactEmbeddings(*quantize_int8(emb)),
+    }
+
+
+def recall_at_k(ref_idx, got_idx):
+    k = ref_idx.shape[1]
+    hits = [len(np.intersect1d(r, g, assume_unique=True)) for r, g in zip(ref_idx, got_idx)]
+    return float(np.sum(hits)) / (len(ref_idx) * k)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Recall/accuracy of reduced-precision embeddings vs float32")
+    ap.add_argument("--embeddings", help="Embeddings file (default: latest from the artifact manifest)")
+    ap.add_argument("--synthetic", type=int, help="Use N synthetic 384-d vectors instead of real data")
+    ap.add_argument("--queries", type=int, default=500, help="kNN query rows sampled from the matrix")
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--anchors", type=int, default=50, help="Random centroids when no topic labels exist")
+    ap.add_argument("--block-size", type=int, default=65_536, help="Rows dequantized at a time")
+    args = ap.parse_args()
+
+    emb, labels, source = load_reference(args)
+    print(f"Reference: {source} ({emb.shape[0]} x {emb.shape[1]})")
+
+    if labels is not None:
+        centroids, ids = topic_centroids(emb, labels)
+        centroid_source = "topics"
+    else:
+        anchors = sample_indices(len(emb), args.anchors, seed=7)
+        centroids, ids = topic_centroids(emb[anchors], np.arange(len(anchors)))
+        centroid_source = "random anchors"
+
+    variants = compact_variants(emb)
+    queries = emb[sample_indices(len(emb), args.queries, seed=1)]
+    ref_idx, _ = variants["float32"].cosine_topk(queries, k=args.k, block_size=args.block_size)
+    ref_topics = assign_to_centroids(variants["float32"], centroids, ids, chunk_size=args.block_size)
+
+    rows = []
+    for name, compact in variants.items():
+        idx, _ = compact.cosine_topk(queries, k=args.k, block_size=args.block_size)
+        topics = assign_to_centroids(compact, centroids, ids, chunk_size=args.block_size)
+        max_err = max(float(np.abs(block - emb[start:start + len(block)]).max())
+                      for start, block in compact.blocks(args.block_size))
+        rows.append({
+            "dtype": name,
+            "mb": round(compact.nbytes / 1e6, 2),
+            "bytes_per_vector": round(compact.nbytes / len(compact), 1),
+            f"recall@{args.k}": round(recall_at_k(ref_idx, idx), 4),
+            "topic_agreement": round(float((topics == ref_topics).mean()), 4),
+            "max_abs_error": round(max_err, 6),
+        })
+
+    df = pd.DataFrame(rows)
+    print(f"\nTopic agreement uses {len(ids)} centroids from {centroid_source}.")
+    print(df.to_string(index=False))
+    os.makedirs("data", exist_ok=True)
+    out = f"data/quantization_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
+    df.to_csv(out, index=False)
+    print(f"\n✅ Saved {out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+# scripts/report.py
+"""
+Headless reporting stage: loads the day's data once and renders every chart
+and table in one process with the non-interactive Agg backend.
+
+Outputs (data/, timestamped, recorded in the artifact manifest):
+ - keyword_frequencies_<ts>.csv + keyword_counts_<ts>.png  (matched keywords)
+ - frequency_analysis_<ts>.xlsx + top_words_<ts>.png + top_bigrams_<ts>.png
+ - topic_counts_<ts>.png                                   (topic sizes)
+ - trend_scores_top_<ts>.png                               (top trend scores)
+
+Each output is skipped when the hash of the data behind it matches the last
+render (data/state/report_hashes.json). --jobs N renders in a process pool.
+
+    python scripts/report.py [--jobs 4] [--force]
+"""
+
+import matplotlib
+matplotlib.use("Agg")
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import matplotlib.pyplot as plt
+import pandas as pd
+
+import artifacts
+from analyze_frequencies import export_excel, word_bigram_counts
+from analyze_results import keyword_counts, plot_keyword_counts
+from viz import plot_topic_counts
+
+HASHES_PATH = "data/state/report_hashes.json"
+TOP_N = 20
+
+
+def data_hash(obj):
+    """Stable content hash of a Series / DataFrame (or list of them)."""
+    h = hashlib.sha1()
+    for part in obj if isinstance(obj, (list, tuple)) else [obj]:
+        h.update(pd.util.hash_pandas_object(part, index=True).values.tobytes())
+        h.update(repr(list(getattr(part, "columns", [part.name]))).encode())
+    return h.hexdigest()
+
+
+def load_hashes():
+    try:
+        with open(HASHES_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_hashes(hashes):
+    os.makedirs(os.path.dirname(HASHES_PATH), exist_ok=True)
+    tmp = HASHES_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(hashes, f, indent=2)
+    os.replace(tmp, HASHES_PATH)
+
+
+def read_csv_or_none(path):
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        df = pd.read_csv(path)
+    except pd.errors.EmptyDataError:
+        return None
+    return None if df.empty else df
+
+
+# ---------- renderers (top-level so they can run in a process pool) ----------
+
+def _barh(series, title, xlabel, output_path):
+    fig, ax = plt.subplots(figsize=(8, 6))
+    series.iloc[::-1].plot(kind="barh", ax=ax, color="steelblue")
+    ax.set_title(title)
+    ax.set_xlabel(xlabel)
+    fig.tight_layout()
+    fig.savefig(output_path)
+    plt.close(fig)
+
+
+def render(kind, data, output_path):
+    if kind == "keyword_frequencies":
+        data.to_csv(output_path, header=["count"])
+    elif kind == "keyword_counts":
+        plot_keyword_counts(data, output_path)
+    elif kind == "topic_counts":
+        plot_topic_counts(data, output_path)
+    elif kind == "frequency_analysis":
+        word_counts, bigram_counts = data
+        export_excel(word_counts, bigram_counts, output_path)
+    elif kind == "top_words":
+        _barh(data, "Top Words", "Count", output_path)
+    elif kind == "top_bigrams":
+        _barh(data, "Top Bigrams", "Count", output_path)
+    elif kind == "trend_scores_top":
+        _barh(data, "Top Topics by Trend Score", "Trend score", output_path)
+    else:
+        raise ValueError(f"unknown report kind: {kind}")
+    return output_path
+
+
+# ---------- build the job list from data loaded once ----------
+
+def build_jobs(ts):
+    """[(kind, data, hash_source, output_path, inputs)] for every report we can make."""
+    jobs = []
+
+    tagged_path = artifacts.resolve("tagged") or "data/rss_results_tagged.csv"
+    tagged = read_csv_or_none(tagged_path)
+    if tagged is not None:
+        counts = keyword_counts(tagged)
+        if not counts.empty:
+            jobs.append(("keyword_frequencies", counts, counts,
+                         f"data/keyword_frequencies_{ts}.csv", [tagged_path]))
+            jobs.append(("keyword_counts", counts, counts,
+                         f"data/keyword_counts_{ts}.png", [tagged_path]))
+
+    clustered_path = artifacts.resolve("clustered") or "data/rss_results_clustered.csv"
+    clustered = read_csv_or_none(clustered_path)
+    if clustered is not None:
+        if "topic" in clustered.columns:
+            topic_counts = clustered["topic"].value_counts().sort_values(ascending=False)
+            jobs.append(("topic_counts", topic_counts, topic_counts,
+                         f"data/topic_counts_{ts}.png", [clustered_path]))
+
+        word_counts, bigram_counts = word_bigram_counts(clustered)
+        words, bigrams = word_counts.head(TOP_N), bigram_counts.head(TOP_N)
+        # the workbook keeps the top 50 of each; ship only those to the worker
+        top50 = (word_counts.head(50), bigram_counts.head(50))
+        jobs.append(("frequency_analysis", top50, list(top50),
+                     f"data/frequency_analysis_{ts}.xlsx", [clustered_path]))
+        jobs.append(("top_words", words, words, f"data/top_words_{ts}.png", [clustered_path]))
+        jobs.append(("top_bigrams", bigrams, bigrams, f"data/top_bigrams_{ts}.png", [clustered_path]))
+
+    scores_path = "data/trend_scores_latest.csv"
+    scores = read_csv_or_none(scores_path)
+    if scores is not None and {"topic", "trend_score"} <= set(scores.columns):
+        top = scores.sort_values("trend_score", ascending=False).head(TOP_N)
+        top = pd.Series(top["trend_score"].values, index=top["topic"].astype(str), name="trend_score")
+        jobs.append(("trend_scores_top", top, top, f"data/trend_scores_top_{ts}.png", [scores_path]))
+
+    return jobs
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Render all report charts/tables headlessly")
+    ap.add_argument("--jobs", type=int, default=1, help="Render in a process pool of this size")
+    ap.add_argument("--force", action="store_true", help="Re-render even if the input data is unchanged")
+    args = ap.parse_args()
+
+    os.makedirs("data", exist_ok=True)
+    ts = datetime.now().strftime("%Y%m%d_%H%M%S")
+    hashes = load_hashes()
+
+    todo = []
+    for kind, data, hash_source, out, inputs in build_jobs(ts):
+        h = data_hash(hash_source)
+        if not args.force and hashes.get(kind) == h:
+            print(f"⏭️  {kind}: input unchanged since last render, skipped")
+            continue
+        todo.append((kind, data, out, inputs, h))
+
+    if not todo:
+        print("✅ Nothing to render.")
+        return
+
+    if args.jobs > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            futures = [pool.submit(render, kind, data, out) for kind, data, out, _, _ in todo]
+            results = [f.result() for f in futures]
+    else:
+        results = [render(kind, data, out) for kind, data, out, _, _ in todo]
+
+    for (kind, data, out, inputs, h), path in zip(todo, results):
+        rows = len(data[0]) if kind == "frequency_analysis" else len(data)
+        artifacts.record(kind, path, rows=rows, inputs=inputs)
+        hashes[kind] = h
+        print(f"✅ Saved {path}")
+
+    save_hashes(hashes)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,66 +3,162 @@
 Master pipeline runner.
 Runs all scripts in the correct order to refresh daily data.
 Saves only today's outputs into a dated folder (DD-MM-YYYY).
+
+Every stage records its outputs in the artifact manifest (artifacts.py) under
+this run's id, so archiving moves exactly those files - no directory diffing.
+
+Deterministic stages are memoized (stage_cache.py): a stage whose inputs,
+code and arguments hash to a fingerprint that already completed is skipped
+and its earlier outputs are republished as this run's. Stages that pull from
+the network (ingest, scrapers) always run. After a failure,
+
+    python scripts/run_pipeline.py --resume
+
+continues the same run: finished network stages are not repeated and
+unchanged stages are cache hits, so only the failed stage and whatever
+depends on its outputs run again. State a stage rewrites itself (the topic
+registry and cluster backlog) is fingerprinted by its digest at run start,
+so a finished cluster_topics.py stays a cache hit on resume instead of
+refitting and updating the registry twice. --force ignores the cache.
 """
 
+import argparse
 import subprocess
 import sys
 import os
 from datetime import datetime
 import shutil
 
-# -------- Create dated folder --------
-run_date = datetime.now().strftime("%d-%m-%Y")  # DD-MM-YYYY
+import artifacts
+import stage_cache
+import topic_registry
+from product_catalogue import CATALOGUE_PATH
+
 base_data_dir = "data"
-dated_dir = os.path.join(base_data_dir, run_date)
 
-os.makedirs(dated_dir, exist_ok=True)
-print(f"📂 Today's run will be archived in: {dated_dir}")
+
+# the registry decides the stable topic ids and the backlog adds carried-over rows;
+# cluster_topics.py rewrites both, so they are fingerprinted by their run-start digest
+CLUSTER_STATE = [topic_registry.REGISTRY_PATH, os.path.splitext(topic_registry.REGISTRY_PATH)[0] + ".npy",
+                 "data/state/cluster_backlog.csv", "data/state/cluster_backlog.npy"]
+SELF_WRITTEN = {"scripts/cluster_topics.py": CLUSTER_STATE}
+
+
+def cluster_inputs():
+    clean = artifacts.resolve("clean")
+    if not clean:
+        return []
+    return [clean, artifacts.derived(clean, "embeddings") or artifacts.resolve("embeddings")] + CLUSTER_STATE
+
+
+def product_term_inputs():
+    from product_terms import legacy_files
+    return legacy_files() + [CATALOGUE_PATH]
+
 
 # -------- Scripts to run --------
+# (command, inputs): inputs returns the files the stage will read, resolved
+# just before it runs; None marks a stage that reads the network (never memoized)
 pipeline = [
-    "scripts/ingest_rss.py",
-    "scripts/tag_keywords.py",
-    "scripts/clean_embed.py",
-    "scripts/cluster_topics.py",
-    "scripts/calc_trend_scores.py",
-    "scripts/analyze_frequencies.py",
-    "scripts/analyze_results.py",
-    "scripts/viz.py",
-    "scripts/moda_new_scraper.py --max-products 50",
-    "scripts/farf_new_scraper.py --max-products 50"
+    ("scripts/ingest_rss.py", None),
+    ("scripts/tag_keywords.py", lambda: [artifacts.resolve("ingest"), "data/seed_keywords.csv"]),
+    ("scripts/clean_embed.py", lambda: [artifacts.resolve("ingest")]),
+    ("scripts/cluster_topics.py", cluster_inputs),
+    ("scripts/doc_term.py", lambda: [artifacts.resolve("clustered")]),
+    ("scripts/burst_detector.py --bucket-hours 24", lambda: [artifacts.resolve("ingest"), artifacts.resolve("clustered")]),
+    ("scripts/cooccurrence.py", lambda: [artifacts.resolve("tagged"), artifacts.resolve("clustered")]),
+    # score_prev / score_delta come from the last trend_scores snapshot of an earlier run
+    ("scripts/calc_trend_scores.py", lambda: artifacts.history("clustered") + [artifacts.previous("trend_scores")]),
+    ("scripts/report.py", lambda: [artifacts.resolve("tagged"), artifacts.resolve("clustered"),
+                                   "data/trend_scores_latest.csv"]),
+    # uncapped: only a complete crawl can mark removals, and known products aren't re-fetched
+    ("scripts/moda_new_scraper.py", None),
+    ("scripts/farf_new_scraper.py", None),
+    ("scripts/product_terms.py", product_term_inputs),
 ]
 
-def run_script(script):
+
+def run_script(script, env=None):
     print(f"\n🚀 Running: {script}")
     try:
-        subprocess.run([sys.executable] + script.split(), check=True)
+        subprocess.run([sys.executable] + script.split(), check=True, env=env)
         print(f"✅ Finished: {script}")
+        return True
     except subprocess.CalledProcessError as e:
         print(f"❌ Error running {script}: {e}")
-        sys.exit(1)
+        return False
+
+
+def run_stage(script, inputs, state, force=False):
+    """Run (or reuse) one stage; returns False on failure."""
+    if inputs is None:
+        if script in state["done"]:
+            print(f"\n⏭️  Already ran in this run: {script}")
+            return True
+        return run_script(script)
+
+    fp = stage_cache.fingerprint(script, [p for p in inputs() if p],
+                                 pinned=state.get("snapshot", {}).get(script))
+    cached = None if force else artifacts.cached_outputs(fp)
+    if cached is not None:
+        for path in cached:
+            artifacts.republish(path, state["run_id"])
+        print(f"\n♻️  Cached: {script} ({len(cached)} outputs, fingerprint {fp[:12]})")
+        return True
+
+    env = {**os.environ, artifacts.FINGERPRINT_ENV: fp}
+    if not run_script(script, env=env):
+        return False
+    artifacts.complete_stage(fp, script)
+    return True
+
 
 if __name__ == "__main__":
-    # Snapshot of files before run
-    before_files = set(os.listdir(base_data_dir))
+    ap = argparse.ArgumentParser(description="Run the full daily pipeline")
+    ap.add_argument("--resume", action="store_true", help="Continue the last failed run under the same run id")
+    ap.add_argument("--force", action="store_true", help="Re-run every stage, ignoring cached outputs")
+    args = ap.parse_args()
 
-    # Run pipeline scripts
-    for script in pipeline:
-        run_script(script)
+    state = stage_cache.load_state() if args.resume else None
+    if state and not state.get("finished"):
+        os.environ[artifacts.RUN_ID_ENV] = state["run_id"]
+        print(f"🔁 Resuming run {state['run_id']} (failed at: {state.get('failed')})")
+    else:
+        if args.resume:
+            print("Nothing to resume; starting a fresh run.")
+        # -------- Create dated folder --------
+        run_date = datetime.now().strftime("%d-%m-%Y")  # DD-MM-YYYY
+        state = {"run_id": artifacts.current_run_id(), "dated_dir": os.path.join(base_data_dir, run_date),
+                 "done": [], "failed": None, "finished": False,
+                 "snapshot": {s: stage_cache.snapshot(paths) for s, paths in SELF_WRITTEN.items()}}
 
-    # Snapshot of files after run
-    after_files = set(os.listdir(base_data_dir))
+    # One run id shared by every stage (inherited through the environment)
+    run_id = artifacts.current_run_id()
+    dated_dir = state["dated_dir"]
+    os.makedirs(dated_dir, exist_ok=True)
+    print(f"🆔 Run id: {run_id}")
+    print(f"📂 Today's run will be archived in: {dated_dir}")
 
-    # Identify only the new files created
-    new_files = [f for f in (after_files - before_files) if os.path.isfile(os.path.join(base_data_dir, f))]
+    # Run pipeline scripts
+    for script, inputs in pipeline:
+        if not run_stage(script, inputs, state, force=args.force):
+            state["failed"] = script
+            stage_cache.save_state(state)
+            print("Fix the problem and re-run with --resume to continue from this stage.")
+            sys.exit(1)
+        if script not in state["done"]:
+            state["done"].append(script)
+        stage_cache.save_state(state)
 
-    # Move new files (except *_latest.csv) into today's folder
-    for f in new_files:
-        if f.endswith(".csv") and "_latest" in f:
-            continue  # keep "latest" snapshots in root
-        src = os.path.join(base_data_dir, f)
-        dst = os.path.join(dated_dir, f)
+    # Move this run's data/ outputs into today's folder ("latest" copies are
+    # never recorded, so they stay in root; models/ stays where it is)
+    for src in artifacts.run_outputs(run_id):
+        if os.path.dirname(src) != base_data_dir or not os.path.isfile(src):
+            continue
+        dst = os.path.join(dated_dir, os.path.basename(src))
         shutil.move(src, dst)
+        artifacts.relocate(src, dst)
 
+    state["finished"] = True
+    stage_cache.save_state(state)
     print(f"\n🎉 All scripts completed. New results archived in: {dated_dir}")
-
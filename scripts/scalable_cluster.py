@@ -0,0 +1,153 @@
+# scripts/scalable_cluster.py
+"""
+Large-corpus clustering helpers for cluster_topics.py --large and the
+scaling benchmark (bench_clustering.py).
+
+The exact path (UMAP on the full matrix + HDBSCAN) is fine for a day of
+articles but is super-linear in time and memory. The large path:
+ 1. fits on a random sample (bounded by sample_size, not corpus size),
+ 2. PCA-reduces the sample before UMAP (384 -> pca_components dims),
+ 3. builds UMAP's kNN graph with approximate NN-descent (low_memory mode),
+ 4. assigns every remaining document to its nearest topic centroid in
+    embedding space, chunk by chunk, so memory stays bounded.
+Sample outliers and unsampled documents get the same rule: nearest
+centroid if the cosine similarity reaches the threshold (by default the
+similarity 95% of the sample's clustered documents have to their own
+centroid), else -1 - so whether a document is an outlier doesn't depend on
+whether it happened to be sampled.
+"""
+
+import numpy as np
+from hdbscan import HDBSCAN
+from sklearn.decomposition import PCA
+from sklearn.pipeline import make_pipeline
+from umap import UMAP
+
+EXACT_UMAP = dict(n_neighbors=15, n_components=5, metric="cosine", random_state=42)
+EXACT_HDBSCAN = dict(min_cluster_size=5, metric="euclidean", cluster_selection_method="eom")
+MEMBER_QUANTILE = 0.05  # default threshold: 5th percentile of member-to-centroid similarity
+
+
+def exact_models():
+    """The configuration cluster_topics.py has always used."""
+    return UMAP(**EXACT_UMAP), HDBSCAN(**EXACT_HDBSCAN)
+
+
+def large_models(n_rows, pca_components=50, n_neighbors=15, min_cluster_size=None, n_features=None):
+    """PCA -> approximate-kNN UMAP reducer and an HDBSCAN sized for n_rows.
+
+    min_cluster_size defaults to ~0.1% of the fitted rows (at least 5), so a
+    sample of 50k doesn't fragment into thousands of micro-topics. PCA is
+    clamped to what n_rows x n_features allows.
+    """
+    if min_cluster_size is None:
+        min_cluster_size = max(5, n_rows // 1000)
+    pca_components = min(pca_components, n_rows, n_features or pca_components)
+    reducer = make_pipeline(
+        PCA(n_components=pca_components, random_state=42),
+        UMAP(n_neighbors=n_neighbors, n_components=5, metric="cosine",
+             low_memory=True, force_approximation_algorithm=True),
+    )
+    clusterer = HDBSCAN(min_cluster_size=min_cluster_size, metric="euclidean",
+                        cluster_selection_method="eom", core_dist_n_jobs=-1)
+    return reducer, clusterer
+
+
+def sample_indices(n, sample_size, seed=42):
+    if n <= sample_size:
+        return np.arange(n)
+    return np.sort(np.random.default_rng(seed).choice(n, sample_size, replace=False))
+
+
+def _unit(x):
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+def topic_centroids(emb, labels, chunk_size=50_000):
+    """(centroids [k, d] unit-normalised, topic_ids [k]) over non-outlier labels.
+
+    Accumulated chunk by chunk, so emb may be a compact (float16/int8) matrix.
+    """
+    labels = np.asarray(labels)
+    ids = np.array(sorted(t for t in set(labels.tolist()) if t != -1), dtype=np.int64)
+    if len(ids) == 0:
+        return np.zeros((0, emb.shape[1]), dtype=np.float32), ids
+    sums = np.zeros((len(ids), emb.shape[1]), dtype=np.float32)
+    for start in range(0, len(labels), chunk_size):
+        lab = labels[start:start + chunk_size]
+        keep = lab != -1
+        np.add.at(sums, np.searchsorted(ids, lab[keep]), _unit(emb[start:start + chunk_size])[keep])
+    return _unit(sums), ids
+
+
+def assign_to_centroids(emb, centroids, ids, min_similarity=0.0, chunk_size=50_000, rows=None):
+    """Nearest-centroid topic for each row (cosine); -1 below min_similarity.
+
+    `rows` restricts assignment to those row indices of emb; rows are pulled
+    chunk by chunk, so a compact (float16/int8) matrix is only dequantized one
+    chunk at a time.
+    """
+    rows = np.arange(len(emb)) if rows is None else np.asarray(rows)
+    out = np.full(len(rows), -1, dtype=np.int64)
+    if len(ids) == 0:
+        return out
+    for start in range(0, len(rows), chunk_size):
+        sims = _unit(emb[rows[start:start + chunk_size]]) @ centroids.T
+        best = sims.argmax(axis=1)
+        ok = sims[np.arange(len(best)), best] >= min_similarity
+        out[start:start + chunk_size] = np.where(ok, ids[best], -1)
+    return out
+
+
+def member_similarity_floor(emb, labels, centroids, ids, quantile=MEMBER_QUANTILE):
+    """Cosine similarity to their own centroid that all but `quantile` of the clustered rows reach."""
+    labels = np.asarray(labels)
+    keep = np.flatnonzero(labels != -1)
+    if len(keep) == 0:
+        return 1.0
+    own = centroids[np.searchsorted(ids, labels[keep])]
+    sims = np.einsum("ij,ij->i", _unit(emb[keep]), own)
+    return float(np.quantile(sims, quantile))
+
+
+def _fill_unclustered(emb, sample, sample_labels, min_similarity=None, chunk_size=50_000):
+    """Labels for all rows: the sample's clusters, and the same nearest-centroid rule
+    (min_similarity, None = member_similarity_floor) for sample outliers and unsampled rows."""
+    labels = np.full(len(emb), -1, dtype=np.int64)
+    labels[sample] = sample_labels
+    sample_emb = emb[sample]
+    centroids, ids = topic_centroids(sample_emb, sample_labels)
+    if min_similarity is None:
+        min_similarity = member_similarity_floor(sample_emb, sample_labels, centroids, ids)
+    todo = np.flatnonzero(labels == -1)  # sample outliers + rows outside the sample
+    if len(todo) and len(ids):
+        labels[todo] = assign_to_centroids(emb, centroids, ids, min_similarity, chunk_size, rows=todo)
+    return labels
+
+
+def cluster_exact(emb):
+    """Labels from the exact path (used by the benchmark as the reference)."""
+    reducer, clusterer = exact_models()
+    return clusterer.fit_predict(reducer.fit_transform(emb))
+
+
+def cluster_large(emb, sample_size=50_000, pca_components=50, min_similarity=None, chunk_size=50_000):
+    """Labels from the large path: fit on a sample, assign the rest to centroids."""
+    sample = sample_indices(len(emb), sample_size)
+    reducer, clusterer = large_models(len(sample), pca_components=pca_components, n_features=emb.shape[1])
+    sample_labels = clusterer.fit_predict(reducer.fit_transform(emb[sample]))
+    return _fill_unclustered(emb, sample, sample_labels, min_similarity, chunk_size)
+
+
+def fit_topic_model_large(topic_model, docs, emb, sample_size=50_000, min_similarity=None, chunk_size=50_000):
+    """Fit a BERTopic model on a sample and assign the rest; returns topics for all docs."""
+    sample = sample_indices(len(docs), sample_size)
+    sample_topics, _ = topic_model.fit_transform([docs[i] for i in sample], embeddings=emb[sample])
+    topics = _fill_unclustered(emb, sample, np.asarray(sample_topics), min_similarity, chunk_size)
+    if len(sample) < len(docs) or (topics[sample] != np.asarray(sample_topics)).any():
+        # refresh sizes and c-TF-IDF representations over the full corpus
+        topic_model.update_topics(docs, topics=topics.tolist())
+    return topics
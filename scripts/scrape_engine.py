@@ -0,0 +1,292 @@
+# scripts/scrape_engine.py
+"""
+Shared engine for the retailer "new in" scrapers.
+
+Each retailer is described by a small SiteAdapter subclass (selectors for the
+product cards, title, designer and next page). The engine handles fetching
+(robots.txt-checked and paced by each host's Crawl-delay, see fetching.py),
+parses every document exactly once and reconciles the crawl against the
+persistent product catalogue (product_catalogue.py): only arrivals and
+removals since the previous crawl are written out, and word / bigram /
+designer counts are accumulated per day over arrivals.
+
+Adding a retailer = one adapter class + a 3-line script, see
+farf_new_scraper.py.
+"""
+
+import argparse
+import os
+import re
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urljoin
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+import artifacts
+import metrics
+from fetching import RobotsDisallowed, fetch, set_min_delay
+from product_catalogue import ProductCatalogue
+
+# lxml is several times faster than the stdlib parser; fall back if missing
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+# Lightweight stopwords to avoid requiring nltk for quick runs
+STOPWORDS = {
+    "the", "and", "for", "with", "from", "this", "that", "are", "new",
+    "all", "one", "our", "in", "on", "by", "of", "to", "a", "an", "at",
+    "left", "just", "only", "preorder"
+}
+
+
+def parse_html(html):
+    return BeautifulSoup(html, PARSER)
+
+
+def clean_tokens(text):
+    # simple tokenization: letters only, lowercase; drop stopwords and length <= 2
+    words = re.findall(r"[A-Za-z']+", (text or "").lower())
+    return [w for w in words if w not in STOPWORDS and len(w) > 2]
+
+
+def select_text(node, selector):
+    """Stripped text of the first match of a CSS selector inside node, or ''."""
+    if not selector:
+        return ""
+    tag = node.select_one(selector)
+    return tag.get_text(strip=True) if tag else ""
+
+
+def select_image(node, selector):
+    """Absolute-or-relative image URL of the first match (src, lazy-load data-src, or og:image content)."""
+    if not selector:
+        return ""
+    tag = node.select_one(selector)
+    if tag is None:
+        return ""
+    url = tag.get("content") or tag.get("src") or tag.get("data-src") or ""
+    if not url and tag.get("srcset"):
+        url = tag["srcset"].split(",")[0].split()[0]
+    return url.strip()
+
+
+class SiteAdapter:
+    """Declarative description of one retailer's new-in listing.
+
+    Most adapters only set class attributes. The methods are the hooks the
+    engine calls; override them when a site needs a heuristic a CSS selector
+    can't express (see ModaOperandi).
+    """
+
+    name = None                   # catalogue key + output file data/<name>_delta_<timestamp>.csv
+    base = None
+    start = None
+
+    card_selector = "a[href]"     # product anchors on a listing page
+    link_pattern = None           # optional regex the card href must match
+
+    # Set these when the listing cards carry title/designer. If card_title is
+    # None the engine fetches each product page and calls parse_product().
+    card_title = None
+    card_designer = None
+    card_image = "img"
+
+    # Product page selectors (only used when card_title is None)
+    product_title = "h1"
+    product_designer = None
+    product_image = "meta[property='og:image']"
+
+    # CSS selectors tried in order for the next listing page; empty = one page
+    next_page_selectors = ()
+
+    def cards(self, soup):
+        """Yield (absolute_url, card_tag) for each product on a listing page."""
+        pattern = re.compile(self.link_pattern) if self.link_pattern else None
+        for a in soup.select(self.card_selector):
+            href = a.get("href")
+            if not href or (pattern and not pattern.search(href)):
+                continue
+            yield urljoin(self.base, href), a
+
+    @property
+    def reads_cards(self):
+        return self.card_title is not None
+
+    def item_from_card(self, url, card):
+        return {
+            "url": url,
+            "designer": select_text(card, self.card_designer),
+            "title": select_text(card, self.card_title),
+            "image_url": self.image_url(select_image(card, self.card_image)),
+        }
+
+    def parse_product(self, url, soup, html):
+        return {
+            "url": url,
+            "title": select_text(soup, self.product_title),
+            "designer": select_text(soup, self.product_designer),
+            "image_url": self.image_url(select_image(soup, self.product_image)),
+        }
+
+    def image_url(self, src):
+        return urljoin(self.base, src) if src else ""
+
+    def next_page(self, soup):
+        for sel in self.next_page_selectors:
+            tag = soup.select_one(sel)
+            if tag is not None and tag.get("href"):
+                return urljoin(self.base, tag["href"])
+        return None
+
+
+class TrendCounter:
+    """Streaming word / bigram / designer counts over scraped items."""
+
+    def __init__(self):
+        self.total = 0
+        self.words = Counter()
+        self.bigrams = Counter()
+        self.designers = Counter()
+
+    def add(self, item):
+        self.total += 1
+        toks = clean_tokens(item["title"])
+        self.words.update(toks)
+        self.bigrams.update(zip(toks, toks[1:]))
+        if item["designer"]:
+            self.designers[item["designer"]] += 1
+
+    def top_words(self, n=20):
+        return self.words.most_common(n)
+
+    def top_bigrams(self, n=20):
+        return [(" ".join(bg), c) for bg, c in self.bigrams.most_common(n)]
+
+    def top_designers(self, n=10):
+        return self.designers.most_common(n)
+
+
+def iter_items(adapter, max_products=None, verbose=True, known=None):
+    """Crawl the adapter's listing pages and yield item dicts as they are found.
+
+    URLs in `known` (already in the catalogue) are yielded as {"url", "known": True}
+    without fetching or parsing their product page. Politeness delays are
+    applied inside fetch(); product pages robots.txt disallows are skipped.
+    """
+    known = known or set()
+    page_url = adapter.start
+    seen = set()
+    n = 0
+    while page_url:
+        if verbose:
+            print("Fetching category:", page_url)
+        html = fetch(page_url)
+        with metrics.registry.timer("trend_scrape_parse_seconds", {"retailer": adapter.name}):
+            soup = parse_html(html)  # single parse: cards and next link share it
+
+        new_cards = [(u, card) for u, card in adapter.cards(soup) if u not in seen]
+        if verbose:
+            print("  found", len(new_cards), "new product links on page")
+
+        for url, card in new_cards:
+            if url in seen:
+                continue
+            seen.add(url)
+            if url in known:
+                item = {"url": url, "known": True}
+            elif adapter.reads_cards:
+                item = adapter.item_from_card(url, card)
+            else:
+                try:
+                    product_html = fetch(url)
+                    with metrics.registry.timer("trend_scrape_parse_seconds", {"retailer": adapter.name}):
+                        item = adapter.parse_product(url, parse_html(product_html), product_html)
+                except RobotsDisallowed:
+                    if verbose:
+                        print("  skipped (robots.txt):", url)
+                    continue
+                except Exception as e:
+                    metrics.registry.inc("trend_scrape_failures_total", {"retailer": adapter.name})
+                    if verbose:
+                        print("  failed parsing:", url, e)
+                    continue
+            yield item
+            n += 1
+            if verbose and n % 50 == 0:
+                print(f"Processed {n} products")
+            if max_products and n >= max_products:
+                return
+
+        page_url = adapter.next_page(soup)
+        if page_url and verbose:
+            print("  next page:", page_url)
+
+
+def write_delta_csv(adapter, arrivals, returned, removals):
+    """Save this run's catalogue delta (one typed row per product) and return its path."""
+    rows = []
+    for change, items in (("arrival", arrivals), ("returned", returned), ("removal", removals)):
+        for it in items:
+            rows.append({
+                "change": change,
+                "url": it["url"],
+                "designer": it.get("designer", ""),
+                "title": it.get("title", ""),
+                "image_url": it.get("image_url", ""),
+            })
+
+    df = pd.DataFrame(rows, columns=["change", "url", "designer", "title", "image_url"])
+    os.makedirs("data", exist_ok=True)
+    timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+    csv_path = f"data/{adapter.name}_delta_{timestamp}.csv"
+    df.to_csv(csv_path, index=False)
+    artifacts.record(f"{adapter.name}_delta", csv_path, df=df)
+    return csv_path
+
+
+def run(adapter, max_products=None, min_delay=1.0, verbose=True, trend_days=7):
+    set_min_delay(min_delay)
+    catalogue = ProductCatalogue()
+    try:
+        known = catalogue.active_urls(adapter.name)
+        items = list(iter_items(adapter, max_products, verbose, known=known))
+        # a capped crawl can't tell us what was delisted
+        complete = not max_products or len(items) < max_products
+        arrivals, returned, removals = catalogue.apply_crawl(adapter.name, items, complete=complete)
+        metrics.registry.inc("trend_scrape_items_total", {"retailer": adapter.name}, len(items))
+        metrics.registry.inc("trend_scrape_arrivals_total", {"retailer": adapter.name}, len(arrivals))
+
+        counter = TrendCounter()
+        for it in arrivals:
+            counter.add(it)
+        catalogue.add_arrival_terms(adapter.name, counter)
+
+        csv_path = write_delta_csv(adapter, arrivals, returned, removals)
+        print("Saved", csv_path)
+
+        # Quick summary
+        print(f"SEEN: {len(items)}  NEW: {len(arrivals)}  RETURNED: {len(returned)}  REMOVED: {len(removals)}")
+        since = (datetime.now(timezone.utc) - timedelta(days=trend_days)).strftime("%Y-%m-%d")
+        print(f"Arrivals per day (last {trend_days}d):", catalogue.arrivals_per_day(adapter.name, since))
+        print("Top 10 designers:", catalogue.top_terms(adapter.name, "designer", since, 10))
+        print("Top 10 bigrams:", catalogue.top_terms(adapter.name, "bigram", since, 10))
+        print("Top 20 words:", catalogue.top_terms(adapter.name, "word", since, 20))
+    finally:
+        catalogue.close()
+        metrics.write(adapter.name)
+
+
+def main(adapter):
+    """Standard CLI shared by every retailer script."""
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--max-products", type=int, default=None, help="Limit total products for fast testing")
+    ap.add_argument("--min-delay", type=float, default=1.0,
+                    help="Seconds between requests to a host whose robots.txt sets no Crawl-delay")
+    ap.add_argument("--trend-days", type=int, default=7, help="Window for the arrival trends printed at the end")
+    args = ap.parse_args()
+    run(adapter, max_products=args.max_products, min_delay=args.min_delay, trend_days=args.trend_days)
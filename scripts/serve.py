@@ -0,0 +1,242 @@
+# scripts/serve.py
+"""
+Local query service for the dashboard and analysts.
+
+Keeps the latest trend scores, topic info, clustered articles and keyword
+counts in memory (pre-indexed by topic, keyword and date) and answers
+filtered, paginated JSON queries without touching the CSVs per request.
+A background thread watches the artifact manifest and trend_scores_latest.csv;
+when the pipeline publishes a new run the next snapshot is built off to the
+side and swapped in with a single reference assignment, so requests never
+see a half-loaded state.
+
+    python scripts/serve.py --port 8765
+
+Endpoints (all GET, JSON; limit/offset on every list):
+    /health
+    /topics                          trend scores + topic names, ?sort=trend_score|mentions_this_week
+    /topics/<id>/articles            articles in a topic, newest first
+    /articles                        ?topic=&keyword=&since=&until=&q=
+    /keywords                        matched-keyword counts
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+
+TREND_SCORES_PATH = "data/trend_scores_latest.csv"
+ARTICLE_FIELDS = ["title", "summary", "link", "matched_keywords", "published_at", "ingested_at", "image_url", "topic"]
+DEFAULT_LIMIT, MAX_LIMIT = 20, 200
+
+
+def _records(df):
+    """DataFrame -> list of JSON-safe dicts (NaN -> None)."""
+    return json.loads(df.to_json(orient="records", date_format="iso"))
+
+
+class Snapshot:
+    """Immutable, fully indexed view of one pipeline run."""
+
+    def __init__(self):
+        self.version = self.source_version()
+        self.loaded_at = pd.Timestamp.now(tz="UTC").isoformat()
+        self._load_articles()
+        self._load_topics()
+
+    @staticmethod
+    def source_version():
+        """Changes whenever the pipeline publishes new inputs."""
+        mtime = os.path.getmtime(TREND_SCORES_PATH) if os.path.exists(TREND_SCORES_PATH) else None
+        return (artifacts.latest("clustered"), artifacts.latest("topic_info"), mtime)
+
+    def _load_articles(self):
+        path = artifacts.resolve("clustered")
+        df = pd.read_csv(path) if path and os.path.exists(path) else pd.DataFrame(columns=ARTICLE_FIELDS)
+        df = df[[c for c in ARTICLE_FIELDS if c in df.columns]].reset_index(drop=True)
+        for col in ("title", "summary", "ingested_at"):
+            if col not in df.columns:
+                df[col] = None
+        ts = pd.to_datetime(df["ingested_at"], utc=True, errors="coerce")
+
+        # newest first; everything below is positions into this order
+        order = ts.sort_values(ascending=False, na_position="last", kind="stable").index
+        df = df.loc[order].reset_index(drop=True)
+        self.ts = ts.loc[order].reset_index(drop=True)
+        self.articles = _records(df)
+        self.search_text = (df["title"].fillna("").astype(str) + " " +
+                            df["summary"].fillna("").astype(str)).str.lower().tolist()
+
+        self.by_topic = {}
+        if "topic" in df.columns:
+            for topic, idx in df.groupby(df["topic"].astype(str)).indices.items():
+                self.by_topic[topic] = idx
+
+        self.by_keyword = {}
+        counts = {}
+        if "matched_keywords" in df.columns:
+            kws = df["matched_keywords"].dropna().astype(str).str.split(", ").explode().str.strip().str.lower()
+            kws = kws[kws != ""]
+            for kw, idx in kws.groupby(kws).groups.items():
+                # a row listing the same keyword twice appears twice after explode
+                self.by_keyword[kw] = np.unique(np.asarray(idx))
+                counts[kw] = len(self.by_keyword[kw])
+        self.keywords = [{"keyword": k, "count": c}
+                         for k, c in sorted(counts.items(), key=lambda kv: (-kv[1], kv[0]))]
+
+    def _load_topics(self):
+        scores = pd.read_csv(TREND_SCORES_PATH) if os.path.exists(TREND_SCORES_PATH) else pd.DataFrame()
+        info_path = artifacts.resolve("topic_info")
+        info = pd.read_csv(info_path) if info_path and os.path.exists(info_path) else pd.DataFrame()
+
+        if not scores.empty:
+            scores["topic"] = scores["topic"].astype(str)
+        if not info.empty:
+            info = info.rename(columns={"Topic": "topic", "Count": "size", "Name": "name",
+                                        "Representation": "representation"})
+            info["topic"] = info["topic"].astype(str)
+            info = info[[c for c in ["topic", "size", "name", "representation"] if c in info.columns]]
+            scores = info if scores.empty else scores.merge(info, on="topic", how="left")
+
+        self.topics_by_sort = {}
+        for key in ("trend_score", "mentions_this_week", "size"):
+            if key in scores.columns:
+                self.topics_by_sort[key] = _records(scores.sort_values(key, ascending=False))
+        self.topics_default = next(iter(self.topics_by_sort.values()), [])
+
+    # ---------- queries ----------
+
+    def topics(self, sort=None):
+        return self.topics_by_sort.get(sort, self.topics_default)
+
+    def article_positions(self, topic=None, keyword=None, since=None, until=None, q=None):
+        """Sorted positions (newest first) matching every given filter."""
+        pos = None
+        if topic is not None:
+            pos = self.by_topic.get(str(topic), np.empty(0, dtype=int))
+        if keyword:
+            kw_pos = self.by_keyword.get(keyword.lower(), np.empty(0, dtype=int))
+            pos = kw_pos if pos is None else np.intersect1d(pos, kw_pos, assume_unique=True)
+        if pos is None:
+            pos = np.arange(len(self.articles))
+        if since or until:
+            ts = self.ts.iloc[pos]
+            mask = np.ones(len(pos), dtype=bool)
+            if since:
+                mask &= (ts >= pd.Timestamp(since, tz="UTC")).values
+            if until:
+                mask &= (ts < pd.Timestamp(until, tz="UTC")).values
+            pos = pos[mask]
+        if q:
+            q = q.lower()
+            pos = np.array([p for p in pos if q in self.search_text[p]], dtype=int)
+        return pos
+
+
+class Store:
+    """Holds the current Snapshot and swaps in a new one when inputs change."""
+
+    def __init__(self, poll_seconds=30):
+        self.snapshot = Snapshot()
+        self.poll_seconds = poll_seconds
+        self._lock = threading.Lock()
+
+    def maybe_reload(self):
+        if Snapshot.source_version() == self.snapshot.version:
+            return False
+        with self._lock:
+            if Snapshot.source_version() == self.snapshot.version:
+                return False
+            fresh = Snapshot()       # built off to the side ...
+            self.snapshot = fresh    # ... then published atomically
+            print(f"🔄 Reloaded snapshot: {fresh.version}")
+            return True
+
+    def watch(self):
+        while True:
+            time.sleep(self.poll_seconds)
+            try:
+                self.maybe_reload()
+            except Exception as e:  # keep serving the old snapshot
+                print("⚠️ Reload failed:", e)
+
+
+def _page(items, params):
+    try:
+        limit = min(max(int(params.get("limit", DEFAULT_LIMIT)), 1), MAX_LIMIT)
+        offset = max(int(params.get("offset", 0)), 0)
+    except ValueError:
+        raise ValueError("limit/offset must be integers")
+    return {"total": len(items), "limit": limit, "offset": offset, "items": items[offset:offset + limit]}
+
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, payload):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Access-Control-Allow-Origin", "*")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            snap = store.snapshot  # one consistent snapshot per request
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            parts = [p for p in url.path.split("/") if p]
+            try:
+                if parts == ["health"]:
+                    return self._send(200, {"status": "ok", "loaded_at": snap.loaded_at,
+                                            "articles": len(snap.articles), "topics": len(snap.topics_default)})
+                if parts == ["topics"]:
+                    return self._send(200, _page(snap.topics(params.get("sort")), params))
+                if len(parts) == 3 and parts[0] == "topics" and parts[2] == "articles":
+                    pos = snap.article_positions(topic=parts[1])
+                    return self._send(200, _page([snap.articles[p] for p in pos], params))
+                if parts == ["articles"]:
+                    pos = snap.article_positions(params.get("topic"), params.get("keyword"),
+                                                 params.get("since"), params.get("until"), params.get("q"))
+                    page = _page(pos, params)
+                    page["items"] = [snap.articles[p] for p in page["items"]]
+                    return self._send(200, page)
+                if parts == ["keywords"]:
+                    return self._send(200, _page(snap.keywords, params))
+                return self._send(404, {"error": f"unknown path {url.path}"})
+            except ValueError as e:
+                return self._send(400, {"error": str(e)})
+
+        def log_message(self, fmt, *args):
+            pass  # keep the terminal quiet under dashboard polling
+
+    return Handler
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Serve trend scores, topics and articles from memory")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--poll", type=int, default=30, help="Seconds between checks for a new pipeline run")
+    args = ap.parse_args()
+
+    store = Store(poll_seconds=args.poll)
+    threading.Thread(target=store.watch, daemon=True).start()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store))
+    print(f"✅ Serving {len(store.snapshot.articles)} articles on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# scripts/stage_cache.py
+"""
+Fingerprints and resume state for run_pipeline.py's stage memoization.
+
+A stage's fingerprint is a SHA-256 over
+ - its command line (script + arguments),
+ - the source of the script and of every local module it imports
+   (transitively, scripts/<name>.py), so editing code invalidates it,
+ - the content of every input file it will read.
+
+Stages run with TREND_STAGE_FINGERPRINT set, so the artifacts they record
+carry it; once the stage exits cleanly the fingerprint is marked complete
+in the manifest (artifacts.complete_stage) and later runs with the same
+fingerprint reuse those outputs.
+
+Pipeline progress (run id, finished steps) is kept in
+data/state/pipeline_run.json so `run_pipeline.py --resume` continues the
+failed run under the same run id instead of starting over. It also holds
+the digests, taken at run start, of state files a stage rewrites itself
+(e.g. the topic registry): those are fingerprinted by their snapshot, so a
+resumed run still matches the stage's completed fingerprint.
+"""
+
+import hashlib
+import json
+import os
+import re
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_PATH = "data/state/pipeline_run.json"
+IMPORT_RE = re.compile(r"^\s*(?:from|import)\s+([A-Za-z_]\w*)", re.MULTILINE)
+
+_digests = {}
+
+
+def file_digest(path):
+    """SHA-256 of a file's content ("missing" if it doesn't exist); memoized on size + mtime."""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return "missing"
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    if key not in _digests:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _digests[key] = h.hexdigest()
+    return _digests[key]
+
+
+def local_modules(script):
+    """The script plus every scripts/ module it imports, transitively (sorted paths)."""
+    seen, todo = set(), [os.path.abspath(script)]
+    while todo:
+        path = todo.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        with open(path, encoding="utf-8") as f:
+            for name in IMPORT_RE.findall(f.read()):
+                dep = os.path.join(SCRIPTS_DIR, name + ".py")
+                if os.path.exists(dep):
+                    todo.append(dep)
+    return sorted(seen)
+
+
+def fingerprint(command, input_paths, pinned=None):
+    """Fingerprint of running `command` (e.g. "scripts/x.py --flag 1") on input_paths.
+
+    pinned maps paths to digests used instead of their current content.
+    """
+    pinned = pinned or {}
+    script = command.split()[0]
+    h = hashlib.sha256()
+    h.update(command.encode())
+    for path in local_modules(script):
+        h.update(os.path.basename(path).encode())
+        h.update(file_digest(path).encode())
+    for path in input_paths:  # content only: archiving a file into a dated folder keeps its fingerprint
+        h.update((pinned.get(path) or file_digest(path)).encode())
+    return h.hexdigest()
+
+
+def snapshot(paths):
+    """{path: digest} of files as they are now."""
+    return {p: file_digest(p) for p in paths}
+
+
+def load_state():
+    try:
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_state(state):
+    os.makedirs(os.path.dirname(STATE_PATH), exist_ok=True)
+    tmp = STATE_PATH + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, STATE_PATH)
@@ -1,41 +1,26 @@
 # scripts/tag_keywords.py
 import pandas as pd
 import os
-import glob
-import re
 import sys
+import argparse
 from datetime import datetime, timezone
 
-def find_latest_raw_ingest():
-    """Prefer files exactly like rss_results_YYYYMMDD_HHMMSS.csv (raw ingest files).
-       If none found, fallback to newest rss_results_*.csv that contains 'ingested_at' column.
-    """
-    files = sorted(glob.glob("data/rss_results_*.csv"))
-    if not files:
-        raise FileNotFoundError("No files matching data/rss_results_*.csv found. Run ingest_rss.py first.")
-    ingest_pattern = re.compile(r"rss_results_\d{8}_\d{6}\.csv$")
-    raw_candidates = [f for f in files if ingest_pattern.search(os.path.basename(f))]
-    if raw_candidates:
-        return sorted(raw_candidates)[-1]
-    # fallback: newest file that actually contains ingested_at
-    for f in sorted(files, reverse=True):
-        try:
-            cols = pd.read_csv(f, nrows=0).columns.tolist()
-            if "ingested_at" in cols:
-                return f
-        except Exception:
-            continue
-    raise FileNotFoundError("No RSS ingest file with ingested_at found. Run ingest_rss.py and try again.")
+import artifacts
 
-# --- choose input file robustly ---
-try:
-    latest_file = find_latest_raw_ingest()
-except FileNotFoundError as e:
-    print("ERROR:", e)
+ap = argparse.ArgumentParser()
+ap.add_argument("--input", nargs="+", help="Raw ingest CSV(s) (default: latest from the artifact manifest)")
+ap.add_argument("--out-dir", default="data", help="Where to write the tagged CSV (backfill writes into dated folders)")
+ap.add_argument("--timestamp", help="Output timestamp (default: now)")
+args = ap.parse_args()
+
+# --- choose input file: latest raw ingest from the artifact manifest ---
+input_files = args.input or [artifacts.resolve("ingest")]
+if input_files[0] is None:
+    print("ERROR: No RSS ingest file found. Run ingest_rss.py first.")
     sys.exit(1)
 
-print("Using latest RSS file:", latest_file)
-df = pd.read_csv(latest_file)
+print("Using RSS file(s):", ", ".join(input_files))
+df = pd.concat([pd.read_csv(f) for f in input_files], ignore_index=True)
 
 # Step 2: load seed keywords file expected to have columns 'category','keyword'
 kw = pd.read_csv("data/seed_keywords.csv")
@@ -64,19 +49,17 @@ if 'ingested_at' not in df.columns:
     print("WARNING: input did not contain 'ingested_at' column. Tagging complete but timestamps are not present.")
 
 # Step 5: save a timestamped CSV and (optionally) a convenience latest copy
-os.makedirs("data", exist_ok=True)
-timestamp = datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
-out_ts = f"data/rss_results_tagged_{timestamp}.csv"
+os.makedirs(args.out_dir, exist_ok=True)
+timestamp = args.timestamp or datetime.now(timezone.utc).strftime("%Y%m%d_%H%M%S")
+out_ts = os.path.join(args.out_dir, f"rss_results_tagged_{timestamp}.csv")
 out_latest = "data/rss_results_tagged.csv"
 
 df.to_csv(out_ts, index=False)
-# also update the non-timestamped "latest" file for compatibility with other scripts
-df.to_csv(out_latest, index=False)
-
+artifacts.record("tagged", out_ts, df=df, inputs=input_files)
 print("Tagged rows saved to", out_ts)
-print("Also updated latest copy:", out_latest)
-
-
-
-
 
+# also update the non-timestamped "latest" file for compatibility with other scripts
+# (not for reprocessed history, which must not replace today's data)
+if not args.input:
+    df.to_csv(out_latest, index=False)
+    print("Also updated latest copy:", out_latest)
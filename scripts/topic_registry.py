@@ -0,0 +1,149 @@
+# scripts/topic_registry.py
+"""
+Persistent topic registry: stable topic ids across BERTopic refits.
+
+cluster_topics.py refits every run, so raw topic 3 today is unrelated to raw
+topic 3 tomorrow. The registry keeps one unit-norm centroid embedding (plus
+top terms, first/last seen and document count) per persistent topic. Each
+new fit's topic centroids are matched to it with the Hungarian algorithm on
+cosine similarity (scipy linear_sum_assignment over the k_new x k_registry
+similarity matrix, O(k^2 * d) - history is never re-embedded):
+ - pairs at or above min_similarity keep the registry id, and the registry
+   centroid drifts towards the new one (exponential moving average)
+ - unmatched new topics get fresh ids
+ - the outlier topic -1 stays -1
+
+Stored as data/state/topic_registry.json (metadata) + topic_registry.npy
+(centroids, same order). Updates hold an exclusive file lock (fcntl, or
+msvcrt on Windows), so parallel backfill workers can share it.
+"""
+
+import json
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+
+REGISTRY_PATH = "data/state/topic_registry.json"
+MIN_SIMILARITY = 0.6
+CENTROID_DECAY = 0.7  # weight of the registry centroid when blending in a matched fit
+TOP_TERMS = 10
+
+
+def _unit(x):
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return x / norms
+
+
+class TopicRegistry:
+    def __init__(self, path=REGISTRY_PATH):
+        self.path = path
+        self.centroids_path = os.path.splitext(path)[0] + ".npy"
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            self.topics = data["topics"]
+            self.next_id = data["next_id"]
+            self.centroids = np.load(self.centroids_path)
+        except (FileNotFoundError, ValueError, KeyError):
+            self.topics, self.next_id, self.centroids = [], 0, None
+
+    @property
+    def ids(self):
+        return np.array([t["id"] for t in self.topics], dtype=np.int64)
+
+    def match(self, centroids, min_similarity=MIN_SIMILARITY):
+        """Registry index for each row of `centroids` (unit-norm), or -1 if unmatched."""
+        out = np.full(len(centroids), -1, dtype=np.int64)
+        if self.centroids is None or not len(self.topics) or not len(centroids):
+            return out
+        sims = centroids @ self.centroids.T
+        rows, cols = linear_sum_assignment(-sims)
+        ok = sims[rows, cols] >= min_similarity
+        out[rows[ok]] = cols[ok]
+        return out
+
+    def assign(self, centroids, raw_ids, terms=None, sizes=None, day=None, min_similarity=MIN_SIMILARITY):
+        """Map raw topic ids of one fit to stable ids, updating the registry in memory.
+
+        centroids [k, d] for raw_ids [k] (outliers excluded); terms / sizes are
+        optional {raw_id: [...]} / {raw_id: n_docs}. Returns {raw_id: stable_id}, with -1 -> -1.
+        """
+        centroids = _unit(centroids)
+        terms, sizes = terms or {}, sizes or {}
+        matched = self.match(centroids, min_similarity)
+        mapping = {-1: -1}
+        new_rows = []
+        for row, (raw, idx) in enumerate(zip(np.asarray(raw_ids).tolist(), matched.tolist())):
+            if idx >= 0:
+                topic = self.topics[idx]
+                self.centroids[idx] = _unit(CENTROID_DECAY * self.centroids[idx]
+                                            + (1 - CENTROID_DECAY) * centroids[row])
+            else:
+                topic = {"id": self.next_id, "first_seen": day, "n_docs": 0, "fits": 0}
+                self.next_id += 1
+                self.topics.append(topic)
+                new_rows.append(centroids[row])
+            topic["last_seen"] = day
+            topic["fits"] += 1
+            topic["n_docs"] += int(sizes.get(raw, 0))
+            if raw in terms:
+                topic["terms"] = list(terms[raw])[:TOP_TERMS]
+            mapping[raw] = topic["id"]
+        if new_rows:
+            stacked = np.stack(new_rows).astype(np.float32)
+            self.centroids = stacked if self.centroids is None else np.vstack([self.centroids, stacked])
+        return mapping
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        np.save(self.centroids_path + ".tmp.npy", self.centroids)
+        os.replace(self.centroids_path + ".tmp.npy", self.centroids_path)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"next_id": self.next_id, "topics": self.topics}, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+def _lock(f):
+    if fcntl:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)  # gives up after ~10s, so keep waiting
+            return
+        except OSError:
+            continue
+
+
+def _unlock(f):
+    if fcntl:
+        fcntl.flock(f, fcntl.LOCK_UN)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def locked(path=REGISTRY_PATH):
+    """Load the registry under an exclusive lock and save it on clean exit."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".lock", "a+") as lock:
+        _lock(lock)
+        try:
+            registry = TopicRegistry(path)
+            yield registry
+            registry.save()
+        finally:
+            _unlock(lock)
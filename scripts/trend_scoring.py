@@ -0,0 +1,90 @@
+# scripts/trend_scoring.py
+"""
+Vectorized trend scoring shared by calc_trend_scores.py (editorial topics)
+and product_terms.py (retailer designers / words / bigrams).
+
+Input is a long table of events with a key column, a week column and
+(optionally) a source column. Everything is pivoted to a key x week matrix,
+so velocity, recency and source counts for every week of history come out
+of a few array operations:
+
+    velocity    = (this - prev) / max(1, prev)       prev = previous week present in the data
+    recency     = 2 * this + prev
+    trend_score = 100 * (0.4 * velocity_norm + 0.3 * recency_norm + 0.3 * source_norm)
+
+with velocity clipped to [-5, 5] and each metric min-max scaled across keys
+within the week.
+"""
+
+import numpy as np
+import pandas as pd
+
+W_V, W_R, W_S = 0.4, 0.3, 0.3
+VELOCITY_CLIP = 5
+
+
+def year_week(times):
+    """Week label used for binning ('%Y-%W', Monday-based weeks)."""
+    return times.dt.strftime('%Y-%W')
+
+
+def _minmax(x):
+    """Column-wise (per week) min-max scaling; constant columns map to 0."""
+    lo = x.min(axis=0, keepdims=True)
+    span = x.max(axis=0, keepdims=True) - lo
+    return np.divide(x - lo, span, out=np.zeros_like(x, dtype=float), where=span > 0)
+
+
+def weekly_matrices(df, key, week_col="year_week", count_col=None, source_col=None):
+    """(mentions, sources) as key x week DataFrames over every week present in df.
+
+    mentions sums count_col (or counts rows); sources counts distinct source_col
+    values (zeros when source_col is None).
+    """
+    keys = [key] if isinstance(key, str) else list(key)
+    if count_col is None:
+        mentions = df.groupby(keys + [week_col]).size()
+    else:
+        mentions = df.groupby(keys + [week_col])[count_col].sum()
+    mentions = mentions.unstack(week_col, fill_value=0).sort_index(axis=1)
+    if source_col is None:
+        sources = pd.DataFrame(0, index=mentions.index, columns=mentions.columns)
+    else:
+        sources = (df.groupby(keys + [week_col])[source_col].nunique()
+                   .unstack(week_col, fill_value=0)
+                   .reindex(index=mentions.index, columns=mentions.columns, fill_value=0))
+    return mentions, sources
+
+
+def score_weeks(mentions, sources, weeks=None):
+    """Long DataFrame of trend metrics for every (key, week) in `weeks` (default: all)."""
+    m = mentions.to_numpy(dtype=float)
+    s = sources.to_numpy(dtype=float)
+    prev = np.zeros_like(m)
+    prev[:, 1:] = m[:, :-1]
+
+    velocity = (m - prev) / np.maximum(1, prev)
+    recency = 2 * m + prev
+    v_norm = _minmax(np.clip(velocity, -VELOCITY_CLIP, VELOCITY_CLIP))
+    r_norm = _minmax(recency)
+    s_norm = _minmax(s)
+    score = (W_V * v_norm + W_R * r_norm + W_S * s_norm) * 100
+
+    cols = list(mentions.columns)
+    pick = [cols.index(w) for w in (weeks if weeks is not None else cols)]
+    index = mentions.index
+    frames = []
+    for j in pick:
+        frame = index.to_frame(index=False)
+        frame["year_week"] = cols[j]
+        frame["mentions_this_week"] = m[:, j].astype(int)
+        frame["mentions_prev_week"] = prev[:, j].astype(int)
+        frame["velocity"] = velocity[:, j]
+        frame["recency"] = recency[:, j]
+        frame["source_count"] = s[:, j].astype(int)
+        frame["velocity_norm"] = v_norm[:, j]
+        frame["recency_norm"] = r_norm[:, j]
+        frame["source_norm"] = s_norm[:, j]
+        frame["trend_score"] = score[:, j]
+        frames.append(frame)
+    return pd.concat(frames, ignore_index=True)
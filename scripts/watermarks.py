@@ -0,0 +1,97 @@
+# scripts/watermarks.py
+"""
+Per-feed incremental watermarks for ingest_rss.py.
+
+For each feed we remember the newest published timestamp we've ingested and
+the GUIDs seen at exactly that timestamp, plus the feed's ETag/Last-Modified
+for conditional GETs. Entries at or before the watermark are skipped before
+any HTML parsing or keyword matching, so per-run CPU scales with new content
+rather than feed size. Entries without a publish date fall back to a small
+bounded set of recent GUIDs.
+
+Stored in data/state/feed_watermarks.json.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+
+WATERMARKS_PATH = "data/state/feed_watermarks.json"
+RECENT_GUIDS_MAX = 500
+
+
+def entry_guid(entry):
+    return entry.get("id") or entry.get("guid") or entry.get("link") or ""
+
+
+def entry_published(entry):
+    """Entry's publish (or last-updated) time as an aware UTC datetime, or None."""
+    for key in ("published_parsed", "updated_parsed"):
+        st = entry.get(key)
+        if st:
+            return datetime(*st[:6], tzinfo=timezone.utc)
+    return None
+
+
+class WatermarkStore:
+    def __init__(self, path=WATERMARKS_PATH):
+        self.path = path
+        try:
+            with open(path) as f:
+                self.feeds = json.load(f)
+        except (FileNotFoundError, ValueError):
+            self.feeds = {}
+
+    def get(self, feed_url):
+        return self.feeds.setdefault(feed_url, {"published": None, "guids_at": [], "recent_guids": []})
+
+    def is_new(self, feed_url, entry):
+        """False if the entry is at or before the feed's watermark."""
+        wm = self.get(feed_url)
+        guid = entry_guid(entry)
+        published = entry_published(entry)
+        if published is None:
+            return guid not in wm["recent_guids"]
+        if wm["published"] is None:
+            return True
+        mark = datetime.fromisoformat(wm["published"])
+        return published > mark or (published == mark and guid not in wm["guids_at"])
+
+    def advance(self, feed_url, entries):
+        """Move the watermark past the entries we just ingested."""
+        wm = self.get(feed_url)
+        for entry in entries:
+            guid = entry_guid(entry)
+            published = entry_published(entry)
+            if published is None:
+                if guid and guid not in wm["recent_guids"]:
+                    wm["recent_guids"] = (wm["recent_guids"] + [guid])[-RECENT_GUIDS_MAX:]
+                continue
+            mark = datetime.fromisoformat(wm["published"]) if wm["published"] else None
+            if mark is None or published > mark:
+                wm["published"] = published.isoformat()
+                wm["guids_at"] = [guid]
+            elif published == mark and guid not in wm["guids_at"]:
+                wm["guids_at"].append(guid)
+
+    def http_validators(self, feed_url):
+        """Conditional-GET headers from the last successful fetch."""
+        wm = self.get(feed_url)
+        headers = {}
+        if wm.get("etag"):
+            headers["If-None-Match"] = wm["etag"]
+        if wm.get("last_modified"):
+            headers["If-Modified-Since"] = wm["last_modified"]
+        return headers
+
+    def set_http_validators(self, feed_url, resp):
+        wm = self.get(feed_url)
+        wm["etag"] = resp.headers.get("ETag")
+        wm["last_modified"] = resp.headers.get("Last-Modified")
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.feeds, f, indent=2)
+        os.replace(tmp, self.path)